@@ -1,6 +1,7 @@
 from colorama import Fore, Style
 from .authentication import GoogleAuthenticator
-from .utils.json_utils import load_json, save_json
+from .utils.json_utils import load_json
+from .utils.storage import get_storage, USER_STATS
 
 class Achievements:
     """
@@ -13,6 +14,7 @@ class Achievements:
         """
         try:
             self.user_id = GoogleAuthenticator().get_stored_user_id()
+            self.storage = get_storage()
             self.all_achievements = load_json('db/achievement.json') or {}
             self.counters = self.__load_counters()
             self.achievements = self.__get_unlocked_achievements()
@@ -31,8 +33,7 @@ class Achievements:
             dict: A dictionary containing 'operations', 'max_streak', and 'current_streak' counters.
         """
         try:
-            user_data = load_json('db/user_stats.json') or {}
-            user_stats = user_data.get(self.user_id, {})
+            user_stats = self.storage.get_value(USER_STATS, self.user_id)
             return {
                 "operations": user_stats.get("operations", 0),
                 "max_streak": user_stats.get("max_streak", 0),
@@ -121,20 +122,22 @@ class Achievements:
 
     def update_counters(self, operations=0, current_streak=0, max_streak=0):
         """
-        Update the user's counters and save them to the JSON file.
+        Update the user's counters and save them to storage.
         """
         try:
-            user_data = load_json('db/user_stats.json') or {}
-            user_stats = user_data.get(self.user_id, {})
-            
-            user_stats['operations'] = user_stats.get('operations', 0) + operations
-            user_stats['current_streak'] = current_streak
-            user_stats['max_streak'] = max(user_stats.get('max_streak', 0), max_streak)
-            
-            user_data[self.user_id] = user_stats
-            save_json('db/user_stats.json', user_data)
+            def apply(user_stats):
+                user_stats['operations'] = user_stats.get('operations', 0) + operations
+                user_stats['current_streak'] = current_streak
+                user_stats['max_streak'] = max(user_stats.get('max_streak', 0), max_streak)
+                return user_stats
+
+            user_stats = self.storage.update_value(USER_STATS, self.user_id, apply)
             
-            self.counters = self.__load_counters()
-            self.update_achievements()  # Update achievements after updating counters
+            self.counters = {
+                "operations": user_stats['operations'],
+                "max_streak": user_stats['max_streak'],
+                "current_streak": user_stats['current_streak']
+            }
+            self.achievements = self.__get_unlocked_achievements()  # Update achievements after updating counters
         except Exception as e:
             print(f"Error updating counters: {e}")
\ No newline at end of file
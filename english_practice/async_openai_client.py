@@ -0,0 +1,274 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from openai import AsyncOpenAI, OpenAIError
+from colorama import Fore, Style
+from .client_registry import get_async_openai_client
+from .request_scheduler import RequestScheduler, get_scheduler
+from .metrics import CallMetrics, get_metrics
+from .audio_cache import AudioCache, get_audio_cache
+from .openai_client import (
+    CHAT_MODEL, TRANSCRIPTION_MODEL, TTS_MODEL, FEEDBACK_PROMPT, FEEDBACK_SECTION_PROMPT,
+    ResponseDelta, read_audio, build_messages, build_translation_prompt, cached_speech, store_speech
+)
+
+"""
+    Notes:
+    AsyncOpenAIClient mirrors OpenAIClient (same prompts, models and error
+    handling) on top of AsyncOpenAI, so independent requests can run at the same
+    time. A semaphore bounds the number of requests in flight, and the shared
+    RequestScheduler applies the same per-endpoint concurrency limits, rate
+    limits, retries and deadlines as for OpenAIClient.
+    Synchronous code uses it through submit() and run(), which execute coroutines
+    on a background event loop thread shared by the whole process.
+    """
+
+
+class _BackgroundLoop:
+    """
+    An asyncio event loop running forever in a daemon thread.
+    """
+
+    def __init__(self):
+        self.__loop: asyncio.AbstractEventLoop = None
+        self.__lock = threading.Lock()
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self.__lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                threading.Thread(target=self.__loop.run_forever, name="openai-async-loop", daemon=True).start()
+            return self.__loop
+
+
+_background_loop = _BackgroundLoop()
+
+
+class AsyncOpenAIClient:
+    """
+    An asyncio client for OpenAI's API services with bounded concurrency.
+
+    Attributes:
+        api_key (str): The OpenAI API key.
+        client (AsyncOpenAI): The asynchronous OpenAI client instance.
+        max_concurrency (int): The maximum number of requests in flight.
+        scheduler (RequestScheduler): Applies rate limits, retries and deadlines to every request.
+        metrics (CallMetrics): Records the latency, token usage and retries of every request.
+        audio_cache (AudioCache): The on-disk cache of synthesized speech shared with OpenAIClient, or None if disabled.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        """
+        Initialize the AsyncOpenAIClient.
+
+        Args:
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 4.
+
+        Raises:
+            ValueError: If the OPENAI_API_KEY environment variable is not set.
+        """
+        try:
+            self.client: AsyncOpenAI = get_async_openai_client()
+            self.api_key: str = self.client.api_key
+            self.max_concurrency: int = max_concurrency
+            self.scheduler: RequestScheduler = get_scheduler()
+            self.metrics: CallMetrics = get_metrics()
+            self.audio_cache: AudioCache = get_audio_cache()
+            self.__semaphores: dict = {}
+        except Exception as e:
+            print(f"{Fore.RED}An error occurred during initialization: {e}{Style.RESET_ALL}")
+            raise
+
+    def __semaphore(self) -> asyncio.Semaphore:
+        """Return the concurrency semaphore of the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in self.__semaphores:
+            self.__semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self.__semaphores[loop]
+
+    # Synchronous bridge
+    def submit(self, coroutine) -> Future:
+        """
+        Schedule a coroutine on the background event loop.
+
+        Args:
+            coroutine: The coroutine to run, e.g. client.get_translation("...").
+
+        Returns:
+            concurrent.futures.Future: Resolves to the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, _background_loop.loop())
+
+    def run(self, coroutine):
+        """
+        Run a coroutine on the background event loop and wait for its result.
+        """
+        return self.submit(coroutine).result()
+
+    def gather(self, *coroutines) -> list:
+        """
+        Run several coroutines concurrently and wait for all their results, in order.
+        """
+        async def gather_all():
+            return await asyncio.gather(*coroutines)
+        return self.run(gather_all())
+
+    # Asynchronous API, matching OpenAIClient
+    async def get_response(self, prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False, on_delta=None) -> str:
+        """
+        Generate a chat response using OpenAI's GPT model.
+
+        Args:
+            prompt (str): The user's input prompt.
+            history (list, optional): The conversation history. Defaults to None.
+            is_translation (bool): Indicates if the request is for translation. Defaults to False.
+            is_extracting_report (bool): Indicates if the request is for extracting a report. Defaults to False.
+            on_delta (callable, optional): Called with every ResponseDelta as it arrives.
+
+        Returns:
+            str: The generated response from the model.
+        """
+        if self.client is None:
+            return f"{Fore.RED}Error: OpenAI client is not initialized.{Style.RESET_ALL}"
+
+        parts = []
+        try:
+            async for delta in self.stream_response_deltas(prompt, history, is_translation, is_extracting_report):
+                parts.append(delta.text)
+                if on_delta:
+                    on_delta(delta)
+            return "".join(parts)
+        except OpenAIError as e:
+            return f"{Fore.RED}An error occurred: {e}{Style.RESET_ALL}"
+
+    async def stream_response_deltas(self, prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False):
+        """
+        Generate a chat response and yield its pieces with timing information.
+
+        Takes the same arguments as get_response.
+
+        Yields:
+            ResponseDelta: The next piece of the response text.
+
+        Raises:
+            OpenAIError: If the request fails; RequestFailedError once retries or the deadline are exhausted.
+        """
+        start = time.perf_counter()
+        messages = build_messages(prompt, history, is_translation, is_extracting_report)
+        with self.metrics.track("chat", CHAT_MODEL) as call:
+            async with self.__semaphore():
+                response_stream = await self.scheduler.call_async("chat", lambda timeout: self.client.chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    temperature=0.8,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    timeout=timeout
+                ), on_retry=call.retried, stream=True)
+                index = 0
+                time_to_first_token = None
+                try:
+                    async for chunk in response_stream:
+                        if chunk.usage:
+                            call.prompt_tokens = chunk.usage.prompt_tokens
+                            call.completion_tokens = chunk.usage.completion_tokens
+                        if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                            elapsed = time.perf_counter() - start
+                            if time_to_first_token is None:
+                                time_to_first_token = elapsed
+                                call.first_byte()
+                            yield ResponseDelta(chunk.choices[0].delta.content, index, elapsed, time_to_first_token)
+                            index += 1
+                finally:
+                    await response_stream.close()
+
+    async def get_translation(self, text: str, on_delta=None) -> str:
+        """
+        Translate text between English and Arabic using OpenAI's GPT model.
+        """
+        if not text:
+            return f"{Fore.RED}No text to translate.{Style.RESET_ALL}"
+
+        return await self.get_response(build_translation_prompt(text), [], is_translation=True, on_delta=on_delta)
+
+    async def get_feedback(self, history: list, on_delta=None) -> str:
+        """
+        Generate feedback on the conversation using OpenAI's GPT model.
+        """
+        return await self.get_response(FEEDBACK_PROMPT, history, on_delta=on_delta)
+
+    async def get_feedback_section(self, focus: str, history: list) -> str:
+        """
+        Generate one section of the feedback on the conversation (see FEEDBACK_SECTIONS).
+
+        Args:
+            focus (str): What the section evaluates.
+            history (list): The conversation history.
+        """
+        return await self.get_response(FEEDBACK_SECTION_PROMPT.format(focus=focus), history)
+
+    async def get_report(self, prompt: str, on_delta=None) -> str:
+        """
+        Generate a markdown progress report using OpenAI's GPT model.
+        """
+        return await self.get_response(prompt, [], is_extracting_report=True, on_delta=on_delta)
+
+    async def transcribe_audio(self, audio="input.wav") -> str:
+        """
+        Transcribe a recording (a file name, bytes or a binary file object) using OpenAI's Whisper model.
+
+        Returns:
+            str: The transcribed text or an error message.
+        """
+        if isinstance(audio, str) and not os.path.exists(audio):
+            return f"{Fore.RED}Error: Audio file '{audio}' not found.{Style.RESET_ALL}"
+
+        try:
+            upload_name, audio_data = read_audio(audio)
+            with self.metrics.track("transcription", TRANSCRIPTION_MODEL) as call:
+                call.audio_bytes = len(audio_data)
+                async with self.__semaphore():
+                    transcript = await self.scheduler.call_async("transcription", lambda timeout: self.client.audio.transcriptions.create(
+                        model=TRANSCRIPTION_MODEL,
+                        file=(upload_name, audio_data),
+                        language="en",
+                        timeout=timeout
+                    ), on_retry=call.retried)
+            return transcript.text
+        except Exception as e:
+            error_message = f"{Fore.RED}An error occurred during audio transcription: {e}{Style.RESET_ALL}"
+            print(error_message)
+            return error_message
+
+    async def text_to_speech(self, text: str, voice: str = "nova") -> bytes:
+        """
+        Convert text to speech using OpenAI's text-to-speech model.
+
+        Previously synthesized utterances are served from the audio cache.
+
+        Returns:
+            bytes: The audio content as bytes, or None if an error occurs.
+        """
+        # The cache reads and writes files, which must not block the event loop
+        cached_audio = await asyncio.to_thread(cached_speech, self.audio_cache, text, voice)
+        if cached_audio:
+            return cached_audio
+
+        try:
+            with self.metrics.track("speech", TTS_MODEL) as call:
+                async with self.__semaphore():
+                    response = await self.scheduler.call_async("speech", lambda timeout: self.client.audio.speech.create(
+                        model=TTS_MODEL,
+                        voice=voice,
+                        input=text,
+                        timeout=timeout
+                    ), on_retry=call.retried)
+                call.audio_bytes = len(response.content)
+            await asyncio.to_thread(store_speech, self.audio_cache, text, voice, response.content)
+            return response.content
+        except Exception as e:
+            error_message = f"{Fore.RED}An error occurred during text-to-speech conversion: {e}{Style.RESET_ALL}"
+            print(error_message)
+            return None
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+import threading
+from .config import get_setting
+
+"""
+    Notes:
+    Synthesized speech is stored on disk in files named after the SHA-256 of
+    (model, voice, format, text), so identical utterances are synthesized once.
+    The modification time of a file doubles as its last-used time: it is
+    refreshed on every hit, and when the cache grows past max_bytes the least
+    recently used files are deleted.
+    """
+
+
+class AudioCache:
+    """
+    A content-addressed, size-capped LRU cache of synthesized audio.
+
+    Attributes:
+        directory (str): The directory holding the cached clips.
+        max_bytes (int): The maximum total size of the cached clips.
+    """
+
+    def __init__(self, directory: str = "db/tts_cache", max_bytes: int = 100 * 1024 * 1024):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.__lock = threading.Lock()
+        self.__stats: dict = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self.__total_bytes: int = sum(entry.stat().st_size for entry in self.__clips())
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, audio_format: str = "mp3") -> str:
+        """
+        Return the content address of an utterance.
+        """
+        return hashlib.sha256("\0".join((model, voice, audio_format, text)).encode("utf-8")).hexdigest()
+
+    def __path(self, key: str, audio_format: str) -> str:
+        return os.path.join(self.directory, f"{key}.{audio_format}")
+
+    def __clips(self) -> list:
+        """Return the cached clips, leaving out temporary files of writes in progress or interrupted."""
+        return [entry for entry in os.scandir(self.directory) if entry.is_file() and not entry.name.startswith(".tmp-")]
+
+    def get(self, text: str, voice: str, model: str, audio_format: str = "mp3") -> bytes:
+        """
+        Return the cached audio for the utterance, or None if it has not been synthesized yet.
+        """
+        path = self.__path(self.key(text, voice, model, audio_format), audio_format)
+        try:
+            with open(path, "rb") as file:
+                audio_data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self.__lock:
+                self.__stats["misses"] += 1
+            return None
+        with self.__lock:
+            self.__stats["hits"] += 1
+        return audio_data
+
+    def put(self, text: str, voice: str, model: str, audio_data: bytes, audio_format: str = "mp3") -> None:
+        """
+        Store synthesized audio and evict the least recently used clips beyond max_bytes.
+        """
+        if not audio_data or len(audio_data) > self.max_bytes:
+            return
+
+        path = self.__path(self.key(text, voice, model, audio_format), audio_format)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(audio_data)
+
+            with self.__lock:
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(temp_path, path)
+                self.__total_bytes += len(audio_data) - previous_size
+                if self.__total_bytes > self.max_bytes:
+                    self.__evict()
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __evict(self) -> None:
+        """Delete the least recently used clips until the cache fits in max_bytes. The caller must hold the lock."""
+        entries = sorted(self.__clips(), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self.__total_bytes <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            self.__total_bytes -= size
+            self.__stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hits, misses, evictions and the total size of the cached clips in bytes.
+        """
+        with self.__lock:
+            return {**self.__stats, "bytes": self.__total_bytes}
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """
+    Return the process-wide audio cache, configured from the environment.
+
+    It is shared by OpenAIClient and AsyncOpenAIClient, so both see the same clips
+    and the size cap covers all of them.
+
+    Returns:
+        AudioCache: The cache, or None if ENGLISH_PRACTICE_TTS_CACHE is disabled.
+    """
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None and get_setting("ENGLISH_PRACTICE_TTS_CACHE", True, bool):
+            _audio_cache = AudioCache(
+                get_setting("ENGLISH_PRACTICE_TTS_CACHE_DIR", "db/tts_cache"),
+                int(get_setting("ENGLISH_PRACTICE_TTS_CACHE_MAX_MB", 100.0, float) * 1024 * 1024)
+            )
+        return _audio_cache
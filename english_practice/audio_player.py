@@ -59,3 +59,50 @@ class AudioPlayer:
             pygame.mixer.music.stop()
             if audio_buffer:
                 audio_buffer.close()
+
+    def play_stream(self, chunks, sample_rate: int = 24000, prebuffer_seconds: float = 0.25):
+        """
+        Play raw PCM audio (16-bit signed, mono) while it is still arriving.
+
+        Playback starts as soon as prebuffer_seconds of audio have been received;
+        the remaining chunks are written to the output device as they come in.
+
+        Args:
+            chunks (Iterable[bytes]): The PCM audio chunks.
+            sample_rate (int, optional): The sample rate of the audio in Hz. Defaults to 24000.
+            prebuffer_seconds (float, optional): Audio buffered before playback starts. Defaults to 0.25.
+        """
+        import pyaudio
+
+        p = None
+        stream = None
+        prebuffer_bytes = int(sample_rate * prebuffer_seconds) * 2
+        buffer = bytearray()
+        try:
+            for chunk in chunks:
+                buffer.extend(chunk)
+                if stream is None and len(buffer) < prebuffer_bytes:
+                    continue
+                if stream is None:
+                    p = pyaudio.PyAudio()
+                    stream = p.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
+                # Only write whole 16-bit samples; keep an odd trailing byte for the next chunk
+                writable = len(buffer) - len(buffer) % 2
+                stream.write(bytes(buffer[:writable]))
+                del buffer[:writable]
+
+            if buffer:
+                if stream is None:
+                    p = pyaudio.PyAudio()
+                    stream = p.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
+                stream.write(bytes(buffer[:len(buffer) - len(buffer) % 2]))
+            if stream is None:
+                print(f"{Fore.YELLOW}Warning: No audio data provided.{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}Error playing audio stream: {e}{Style.RESET_ALL}")
+        finally:
+            if stream:
+                stream.stop_stream()
+                stream.close()
+            if p:
+                p.terminate()
@@ -0,0 +1,253 @@
+import io
+import math
+import shutil
+import subprocess
+import wave
+import numpy as np
+from colorama import Fore, Style
+
+"""
+    Notes:
+    Recordings are captured at 44.1 kHz, but speech recognition only needs
+    16 kHz, so they are resampled before upload. Resampling is done in the
+    frequency domain with NumPy: the spectrum is truncated to the new Nyquist
+    frequency, which low-pass filters and resamples the whole recording in one
+    vectorized step. The result can then be encoded with ffmpeg (FLAC is
+    lossless, MP3 and Ogg/Opus are lossy and much smaller); without ffmpeg the
+    recording is uploaded as WAV.
+    VoiceActivityDetector classifies recorded chunks as speech or silence from
+    their energy and zero-crossing rate, so a recording can stop by itself once
+    the speaker has been quiet for a while and be trimmed to the speech.
+    """
+
+SPEECH_SAMPLE_RATE = 16000
+
+# ffmpeg arguments for each upload format accepted by the transcription API
+FFMPEG_FORMATS = {
+    "flac": ["-c:a", "flac", "-f", "flac"],
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "32k", "-f", "mp3"],
+    "ogg": ["-c:a", "libopus", "-b:a", "24k", "-f", "ogg"],
+}
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample 16-bit mono audio.
+
+    Args:
+        samples (np.ndarray): The samples as int16.
+        source_rate (int): The sample rate of samples in Hz.
+        target_rate (int): The sample rate to convert to in Hz.
+
+    Returns:
+        np.ndarray: The resampled audio as int16.
+    """
+    if source_rate == target_rate or not len(samples):
+        return samples
+    length = max(1, round(len(samples) * target_rate / source_rate))
+    spectrum = np.fft.rfft(samples.astype(np.float64))
+    # Keeping only the bins below the lower Nyquist frequency is an ideal low-pass filter
+    bins = min(len(spectrum), length // 2 + 1)
+    resampled = np.fft.irfft(spectrum[:bins], length) * (length / len(samples))
+    return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+
+
+def read_wav(audio) -> tuple[np.ndarray, int]:
+    """
+    Read a 16-bit WAV recording as mono samples.
+
+    Args:
+        audio (str | bytes | file-like): A WAV file name, WAV bytes or a binary file object.
+
+    Returns:
+        tuple[np.ndarray, int]: The int16 samples and the sample rate.
+
+    Raises:
+        ValueError: If the recording is not 16-bit PCM.
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        audio = io.BytesIO(audio)
+    with wave.open(audio, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit recordings can be resampled, not {wf.getsampwidth() * 8}-bit.")
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+def wav_buffer(samples: np.ndarray, rate: int, name: str = "input.wav") -> io.BytesIO:
+    """
+    Encode 16-bit mono samples as an in-memory WAV file named name.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.astype("<i2").tobytes())
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+def encode(wav: io.BytesIO, audio_format: str) -> io.BytesIO:
+    """
+    Encode an in-memory WAV file with ffmpeg.
+
+    Args:
+        wav (io.BytesIO): The WAV data.
+        audio_format (str): "flac", "mp3" or "ogg".
+
+    Returns:
+        io.BytesIO: The encoded audio named input.<audio_format>, or wav itself if ffmpeg
+        is not installed or fails.
+    """
+    if audio_format not in FFMPEG_FORMATS:
+        print(f"{Fore.YELLOW}Unknown upload format '{audio_format}', uploading WAV instead.{Style.RESET_ALL}")
+        return wav
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        print(f"{Fore.YELLOW}ffmpeg is not installed, uploading WAV instead of {audio_format}.{Style.RESET_ALL}")
+        return wav
+
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", *FFMPEG_FORMATS[audio_format], "pipe:1"],
+            input=wav.getvalue(), capture_output=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"{Fore.YELLOW}Could not encode the recording as {audio_format}, uploading WAV instead: {e}{Style.RESET_ALL}")
+        return wav
+    encoded = io.BytesIO(result.stdout)
+    encoded.name = f"input.{audio_format}"
+    return encoded
+
+
+def prepare_for_upload(audio, sample_rate: int = SPEECH_SAMPLE_RATE, audio_format: str = "wav") -> io.BytesIO:
+    """
+    Shrink a WAV recording for transcription.
+
+    Args:
+        audio (str | bytes | file-like): The WAV recording.
+        sample_rate (int, optional): The sample rate to upload at; 0 keeps the recorded rate.
+            Recordings are never upsampled. Defaults to SPEECH_SAMPLE_RATE.
+        audio_format (str, optional): "wav", or "flac", "mp3" or "ogg" (encoded with ffmpeg). Defaults to "wav".
+
+    Returns:
+        io.BytesIO: The recording to upload.
+    """
+    samples, rate = read_wav(audio)
+    if sample_rate and sample_rate < rate:
+        samples = resample(samples, rate, sample_rate)
+        rate = sample_rate
+    wav = wav_buffer(samples, rate)
+    if audio_format and audio_format != "wav":
+        return encode(wav, audio_format)
+    return wav
+
+
+class VoiceActivityDetector:
+    """
+    Detects speech in a stream of 16-bit mono PCM chunks.
+
+    A chunk is speech when its RMS energy is above the threshold, or above half of it
+    with a high zero-crossing rate (unvoiced sounds such as "s" and "f" are quiet but
+    noisy). The threshold adapts to the background noise measured in silent chunks.
+    The initial noise floor is the quietest chunk of the first calibration seconds,
+    capped at max_noise_floor, so speech or a key click right at the start of the
+    recording cannot raise it.
+
+    Attributes:
+        rate (int): The sample rate in Hz.
+        chunk_size (int): The number of samples per chunk.
+        min_energy (float): The lowest RMS energy that counts as speech.
+        noise_factor (float): How far above the noise floor speech must be.
+        zcr_threshold (float): The zero-crossing rate (per sample) of unvoiced speech.
+        trailing_silence (float): Seconds of silence after speech that end the recording.
+        min_speech (float): Seconds of speech needed before the recording can end by itself.
+        padding (float): Seconds of audio kept around the speech when trimming.
+        calibration (float): Seconds at the start used to measure the background noise.
+        max_noise_floor (float): The highest RMS energy the initial noise floor is set to.
+        flags (list[bool]): Whether each processed chunk was speech.
+    """
+
+    def __init__(self, rate: int, chunk_size: int, min_energy: float = 300.0, noise_factor: float = 3.0,
+                 zcr_threshold: float = 0.25, trailing_silence: float = 1.2, min_speech: float = 0.3, padding: float = 0.25,
+                 calibration: float = 0.3, max_noise_floor: float = 600.0):
+        self.rate: int = rate
+        self.chunk_size: int = chunk_size
+        self.min_energy: float = min_energy
+        self.noise_factor: float = noise_factor
+        self.zcr_threshold: float = zcr_threshold
+        self.trailing_silence: float = trailing_silence
+        self.min_speech: float = min_speech
+        self.padding: float = padding
+        self.calibration: float = calibration
+        self.max_noise_floor: float = max_noise_floor
+        self.flags: list[bool] = []
+        self.__noise_floor: float = None
+        self.__speech_chunks: int = 0
+        self.__silent_chunks: int = 0
+
+    def __chunks(self, seconds: float) -> int:
+        return math.ceil(seconds * self.rate / self.chunk_size)
+
+    def process(self, chunk: bytes) -> bool:
+        """
+        Classify the next chunk.
+
+        Returns:
+            bool: Whether the chunk is speech.
+        """
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32)
+        if not len(samples):
+            return False
+        energy = float(np.sqrt(np.mean(samples * samples)))
+        crossings = float(np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1]))) / len(samples)
+
+        calibrating = len(self.flags) < self.__chunks(self.calibration)
+        if calibrating:
+            quietest = energy if self.__noise_floor is None else min(self.__noise_floor, energy)
+            self.__noise_floor = min(quietest, self.max_noise_floor)
+        threshold = max(self.min_energy, self.__noise_floor * self.noise_factor)
+        is_speech = energy > threshold or (energy > threshold / 2 and crossings > self.zcr_threshold)
+
+        if is_speech:
+            self.__speech_chunks += 1
+            self.__silent_chunks = 0
+        else:
+            self.__silent_chunks += 1
+            if not calibrating:
+                # Follow the background noise slowly, so a pause does not reset it
+                self.__noise_floor = 0.95 * self.__noise_floor + 0.05 * energy
+        self.flags.append(is_speech)
+        return is_speech
+
+    @property
+    def heard_speech(self) -> bool:
+        return self.__speech_chunks >= self.__chunks(self.min_speech)
+
+    def paused(self, seconds: float) -> bool:
+        """Whether speech has been heard and the last chunks, covering at least seconds, were silent."""
+        return self.__speech_chunks > 0 and self.__silent_chunks >= self.__chunks(seconds)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the speaker has stopped: enough speech followed by trailing_silence seconds of silence."""
+        return self.heard_speech and self.paused(self.trailing_silence)
+
+    def speech_span(self) -> tuple[int, int]:
+        """
+        Returns:
+            tuple[int, int]: The first and one past the last chunk to keep (the speech plus
+            padding), or None if no speech was heard.
+        """
+        if not self.heard_speech:
+            return None
+        first = self.flags.index(True)
+        last = len(self.flags) - 1 - self.flags[::-1].index(True)
+        padding = self.__chunks(self.padding)
+        return max(0, first - padding), min(len(self.flags), last + 1 + padding)
@@ -1,33 +1,116 @@
+import io
+import os
+import sys
 import pyaudio
 import wave
 import threading
 from colorama import Fore, Style
+from .audio_processing import VoiceActivityDetector
 
 """
-    Notes: 
-    The role of threading in this code is :
-    - It enables continuous audio recording in the background while the main thread waits for user input to stop the recording.
-    - It prevents the program from blocking during the recording process, ensuring responsiveness to user commands.
+    Notes:
+    Recording runs in PyAudio's callback mode: PortAudio calls back on its own
+    thread with each block of input, and the callback only copies it into an
+    AudioBuffer, a bytearray preallocated for INITIAL_BUFFER_SECONDS that
+    doubles when full, up to max_duration. Appending therefore almost never
+    allocates, no reader thread can fall behind the device, and the recording
+    is never joined from pieces: WAV files, segments and the voice activity
+    detector all read it through zero-copy memoryviews.
+    The main thread waits for Enter; with auto_stop or on_segment, a
+    processing thread runs every chunk through a VoiceActivityDetector. With
+    auto_stop the recording ends once the speaker has been silent for
+    trailing_silence seconds and the silence around the speech is trimmed.
+    With on_segment, the recording is also cut at pauses into segments of at
+    least MIN_SEGMENT_SECONDS, each starting SEGMENT_OVERLAP_SECONDS before its
+    speech, and every segment is handed over as soon as it is cut so it can be
+    transcribed while the user keeps talking.
     """
+
+
+class AudioBuffer:
+    """
+    A growable buffer for recorded PCM data, preallocated so that appending rarely allocates.
+
+    When the buffer is full it is replaced by one twice the size (never beyond max_bytes).
+    Views handed out earlier keep the old storage alive, so they stay valid.
+
+    Attributes:
+        max_bytes (int): The size the buffer never grows beyond.
+    """
+
+    def __init__(self, initial_bytes: int, max_bytes: int):
+        self.max_bytes: int = max_bytes
+        self.__data: bytearray = bytearray(min(initial_bytes, max_bytes))
+        self.__length: int = 0
+
+    def __len__(self) -> int:
+        return self.__length
+
+    @property
+    def full(self) -> bool:
+        return self.__length >= self.max_bytes
+
+    def append(self, data: bytes) -> bool:
+        """
+        Copy data to the end of the buffer.
+
+        Returns:
+            bool: False if max_bytes was reached; only the part of data that fit was kept.
+        """
+        end = self.__length + len(data)
+        if end > len(self.__data) and len(self.__data) < self.max_bytes:
+            grown = bytearray(min(max(end, 2 * len(self.__data)), self.max_bytes))
+            grown[:self.__length] = memoryview(self.__data)[:self.__length]
+            self.__data = grown
+        fits = min(len(data), len(self.__data) - self.__length)
+        self.__data[self.__length:self.__length + fits] = memoryview(data)[:fits]
+        self.__length += fits
+        return fits == len(data)
+
+    def view(self, start: int = 0, end: int = None) -> memoryview:
+        """
+        Return a zero-copy view of the bytes from start to end (by default, to the end of the recorded data).
+        """
+        end = self.__length if end is None else min(end, self.__length)
+        return memoryview(self.__data)[start:end]
+
+
 class AudioRecorder:
     """
     A class for recording audio data using PyAudio.
 
     This class provides functionality to record audio input from the default microphone
-    and save it to a WAV file.
+    and save it to a WAV file, or keep it in memory as a WAV buffer.
     Attributes:
         CHUNK (int): The number of audio frames per buffer.
         FORMAT (int): The sample format (e.g., pyaudio.paInt16).
         CHANNELS (int): The number of audio channels (1 for mono, 2 for stereo).
         RATE (int): The sampling rate in Hz.
+        SEGMENT_PAUSE_SECONDS (float): The silence at which a segment may be cut.
+        MIN_SEGMENT_SECONDS (float): The shortest segment that is cut before the recording ends.
+        SEGMENT_OVERLAP_SECONDS (float): The audio each segment repeats before its speech.
+        INITIAL_BUFFER_SECONDS (float): The length of audio the recording buffer is preallocated for.
+        auto_stop (bool): Whether to stop after trailing silence and trim the silence.
+        trailing_silence (float): Seconds of silence after speech that stop the recording.
+        max_duration (float): The longest recording in seconds; recording stops when it is reached.
+        last_recording (memoryview): A zero-copy view of the PCM data of the last recording
+            (trimmed with auto_stop), or None.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, auto_stop: bool = False, trailing_silence: float = 1.2, max_duration: float = 300.0) -> None:
         """Initialize the AudioRecorder with default audio parameters."""
         self.CHUNK: int = 1024
         self.FORMAT: int = pyaudio.paInt16
         self.CHANNELS: int = 1
         self.RATE: int = 44100
+        self.SEGMENT_PAUSE_SECONDS: float = 0.5
+        self.MIN_SEGMENT_SECONDS: float = 5.0
+        self.SEGMENT_OVERLAP_SECONDS: float = 0.3
+        self.INITIAL_BUFFER_SECONDS: float = 30.0
+        self.auto_stop: bool = auto_stop
+        self.trailing_silence: float = trailing_silence
+        self.max_duration: float = max_duration
+        self.last_recording: memoryview = None
 
     def record_audio(self, filename: str = "input.wav") -> None:
         """
@@ -42,8 +125,78 @@ class AudioRecorder:
         Raises:
             IOError: If there's an error during audio recording or file writing.
         """
+        audio = self.__record_pcm()
+        if audio:
+            self.__save_audio_to_file(filename, audio)
+        elif audio is not None:
+            print(f"{Fore.RED}No audio data recorded.{Style.RESET_ALL}")
+
+    def record_to_buffer(self, debug_filename: str = None, on_segment=None) -> io.BytesIO:
+        """
+        Record audio from the default microphone into an in-memory WAV file.
+
+        Nothing is written to disk unless debug_filename is given, so concurrent
+        sessions cannot overwrite each other's recordings.
+
+        Args:
+            debug_filename (str, optional): Also save the recording to this file. Defaults to None.
+            on_segment (callable, optional): Called from the recording thread with each segment
+                of speech, as an in-memory WAV file, while recording continues; the last segment
+                is passed before this method returns. Defaults to None.
+
+        Returns:
+            io.BytesIO: The WAV data, positioned at the start, or None if nothing was recorded.
+            Its name attribute ("input.wav" or debug_filename) tells the transcription API the format.
+        """
+        audio = self.__record_pcm(on_segment)
+        if not audio:
+            if audio is not None:
+                print(f"{Fore.RED}No audio data recorded.{Style.RESET_ALL}")
+            return None
+
+        buffer = self.__wav_buffer(audio, os.path.basename(debug_filename) if debug_filename else "input.wav")
+        if debug_filename:
+            self.__save_audio_to_file(debug_filename, audio)
+        return buffer
+
+    def __record_pcm(self, on_segment=None) -> memoryview:
+        """
+        Record from the default microphone until the user presses Enter (or stops talking, with
+        auto_stop), or until max_duration is reached.
+
+        Args:
+            on_segment (callable, optional): Receives the segments of speech (see record_to_buffer).
+
+        Returns:
+            memoryview: The recorded PCM data (a view of the recording buffer), or None if the
+            audio stream could not be opened.
+        """
         p: pyaudio.PyAudio = None
         stream: pyaudio.Stream = None
+        frame_bytes: int = pyaudio.get_sample_size(self.FORMAT) * self.CHANNELS
+        chunk_bytes: int = self.CHUNK * frame_bytes
+        buffer = AudioBuffer(int(self.INITIAL_BUFFER_SECONDS * self.RATE) * frame_bytes, int(self.max_duration * self.RATE) * frame_bytes)
+        stopped = threading.Event()
+        new_audio = threading.Condition()
+        overflows: int = 0
+
+        def callback(in_data: bytes, frame_count: int, time_info: dict, status: int) -> tuple:
+            """
+            Called by PortAudio on its own thread with every block of input.
+
+            It only copies the block into the preallocated buffer; detecting speech and
+            cutting segments happen on the processing thread.
+            """
+            nonlocal overflows
+            if status & pyaudio.paInputOverflow:
+                overflows += 1
+            complete = not buffer.append(in_data)
+            with new_audio:
+                new_audio.notify()
+            if complete:
+                stopped.set()
+                return None, pyaudio.paComplete
+            return None, pyaudio.paContinue
 
         try:
             p = pyaudio.PyAudio()
@@ -52,85 +205,166 @@ class AudioRecorder:
                 channels=self.CHANNELS,
                 rate=self.RATE,
                 input=True,
-                frames_per_buffer=self.CHUNK
+                frames_per_buffer=self.CHUNK,
+                stream_callback=callback,
+                start=False
             )
         except Exception as e:
             print(f"{Fore.RED}Error initializing PyAudio or opening audio stream: {e}{Style.RESET_ALL}")
             if p:
                 p.terminate()
-            return
+            return None
 
         print(f"{Fore.YELLOW}Press Enter to start recording. Press Enter again to stop.{Style.RESET_ALL}")
         input()  # Wait for Enter to start recording
 
-        print(f"{Fore.GREEN}Recording... Press Enter to stop.{Style.RESET_ALL}")
-        frames: list[bytes] = []
+        if self.auto_stop:
+            print(f"{Fore.GREEN}Recording... Stop talking or press Enter to stop.{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.GREEN}Recording... Press Enter to stop.{Style.RESET_ALL}")
         recording: bool = True
+        vad = VoiceActivityDetector(self.RATE, self.CHUNK, trailing_silence=self.trailing_silence) if self.auto_stop or on_segment else None
+        segment_start: int = 0
+
+        def cut_segment(end: int) -> None:
+            """Pass chunks segment_start to end on as a segment if they hold speech."""
+            nonlocal segment_start
+            speech = vad.flags[segment_start:end]
+            if True in speech:
+                # Start a little before the speech; at a segment boundary this overlaps the previous segment
+                start = max(0, segment_start + speech.index(True) - self.__chunks(self.SEGMENT_OVERLAP_SECONDS))
+                on_segment(self.__wav_buffer(buffer.view(start * chunk_bytes, end * chunk_bytes)))
+            segment_start = end
 
-        def record() -> None:
+        def process() -> None:
             """
-            Internal function to continuously record audio data.
+            Run every complete chunk of the recording through the voice activity detector.
 
-            This function runs in a separate thread and appends audio data to the frames list
-            until the recording flag is set to False.
+            This function runs in a separate thread, reading the buffer through zero-copy
+            views, until the recording has stopped and every chunk has been processed.
             """
-            nonlocal recording
-            while recording:
-                try:
-                    data: bytes = stream.read(self.CHUNK, exception_on_overflow=False)
-                    frames.append(data)
-                except IOError as e:
-                    if e.errno == pyaudio.paInputOverflowed:
-                        print(f"{Fore.YELLOW}Warning: Audio input overflowed{Style.RESET_ALL}")
-                    else:
-                        print(f"{Fore.RED}Error recording audio: {e}{Style.RESET_ALL}")
-                        recording = False
-                except Exception as e:
-                    print(f"{Fore.RED}Unexpected error during recording: {e}{Style.RESET_ALL}")
-                    recording = False
-
-        # Start recording in a separate thread
-        record_thread: threading.Thread = threading.Thread(target=record)
-        record_thread.start()
-
-        # Wait for user to press Enter to stop recording
-        input()
-        recording = False
-
-        # Wait for the recording thread to finish
-        record_thread.join()
+            processed: int = 0
+            while True:
+                with new_audio:
+                    new_audio.wait_for(lambda: len(buffer) - processed >= chunk_bytes or not recording)
+                while len(buffer) - processed >= chunk_bytes:
+                    try:
+                        vad.process(buffer.view(processed, processed + chunk_bytes))
+                        processed += chunk_bytes
+                        if self.auto_stop and vad.finished:
+                            stopped.set()
+                        elif (on_segment and vad.paused(self.SEGMENT_PAUSE_SECONDS)
+                              and len(vad.flags) - segment_start >= self.__chunks(self.MIN_SEGMENT_SECONDS)):
+                            cut_segment(len(vad.flags))
+                    except Exception as e:
+                        print(f"{Fore.RED}Unexpected error while processing the recording: {e}{Style.RESET_ALL}")
+                        stopped.set()
+                        return
+                if not recording:
+                    return
 
-        print(f"{Fore.GREEN}Recording stopped.{Style.RESET_ALL}")
+        process_thread: threading.Thread = None
+        try:
+            stream.start_stream()
+            if vad:
+                # Process the audio in a separate thread
+                process_thread = threading.Thread(target=process)
+                process_thread.start()
 
-        if stream:
+            # Wait for user to press Enter (or for the recording to stop by itself)
+            self.__wait_for_enter(stopped)
+        except Exception as e:
+            print(f"{Fore.RED}Error recording audio: {e}{Style.RESET_ALL}")
+        finally:
             stream.stop_stream()
             stream.close()
-        if p:
             p.terminate()
+            recording = False
+            with new_audio:
+                new_audio.notify_all()
+            # Wait for the processing thread to catch up with the recording
+            if process_thread:
+                process_thread.join()
 
-        if frames:
-            self.__save_audio_to_file(filename, p, frames)
-        else:
-            print(f"{Fore.RED}No audio data recorded.{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}Recording stopped.{Style.RESET_ALL}")
+        if buffer.full:
+            print(f"{Fore.YELLOW}The recording reached its maximum length of {self.max_duration:g} seconds.{Style.RESET_ALL}")
+        if overflows:
+            print(f"{Fore.YELLOW}Warning: Audio input overflowed {overflows} times{Style.RESET_ALL}")
+
+        audio = buffer.view()
+        if on_segment and audio:
+            span = vad.speech_span()
+            cut_segment(span[1] if span else len(vad.flags))
+        if self.auto_stop and audio:
+            span = vad.speech_span()
+            if span:
+                audio = buffer.view(span[0] * chunk_bytes, span[1] * chunk_bytes)
+            else:
+                print(f"{Fore.YELLOW}No speech was detected in the recording.{Style.RESET_ALL}")
+        self.last_recording = audio
+        return audio
+
+    def __chunks(self, seconds: float) -> int:
+        """Return the number of chunks covering seconds of audio."""
+        return max(1, round(seconds * self.RATE / self.CHUNK))
+
+    def __wav_buffer(self, audio, name: str = "input.wav") -> io.BytesIO:
+        """Return the PCM data as an in-memory WAV file, positioned at the start."""
+        buffer = io.BytesIO()
+        self.__write_wav(buffer, audio)
+        buffer.seek(0)
+        buffer.name = name
+        return buffer
+
+    @staticmethod
+    def __wait_for_enter(stopped: threading.Event) -> None:
+        """
+        Wait until the user presses Enter or stopped is set.
+
+        Unlike input(), this leaves nothing waiting on the keyboard once the recording
+        has stopped by itself, so the next prompt gets the user's next line.
+        """
+        if os.name == "nt":
+            import msvcrt
+            while not stopped.wait(0.05):
+                if msvcrt.kbhit() and msvcrt.getwch() in "\r\n":
+                    return
+            return
+
+        import select
+        while not stopped.is_set():
+            if select.select([sys.stdin], [], [], 0.05)[0]:
+                sys.stdin.readline()
+                return
+
+    def __write_wav(self, target, audio) -> None:
+        """
+        Write the recorded audio data as WAV.
+
+        Args:
+            target (str | file-like): The file name or binary file object to write to.
+            audio (bytes-like): The recorded PCM data.
+        """
+        with wave.open(target, 'wb') as wf:
+            wf.setnchannels(self.CHANNELS)
+            wf.setsampwidth(pyaudio.get_sample_size(self.FORMAT))
+            wf.setframerate(self.RATE)
+            wf.writeframes(audio)
 
-    def __save_audio_to_file(self, filename: str, p: pyaudio.PyAudio, frames: list[bytes]) -> None:
+    def __save_audio_to_file(self, filename: str, audio) -> None:
         """
         Save the recorded audio data to a WAV file.
 
         Args:
             filename (str): The name of the file to save the audio data to.
-            p (pyaudio.PyAudio): The PyAudio instance used for recording.
-            frames (list[bytes]): The list of recorded audio frames.
+            audio (bytes-like): The recorded PCM data.
 
         Raises:
             IOError: If there's an error writing the audio data to the file.
         """
         try:
-            with wave.open(filename, 'wb') as wf:
-                wf.setnchannels(self.CHANNELS)
-                wf.setsampwidth(p.get_sample_size(self.FORMAT))
-                wf.setframerate(self.RATE)
-                wf.writeframes(b''.join(frames))
+            self.__write_wav(filename, audio)
             print(f"{Fore.GREEN}Audio saved to {filename}{Style.RESET_ALL}")
         except IOError as e:
             print(f"{Fore.RED}Error saving audio to file: {e}{Style.RESET_ALL}")
@@ -4,6 +4,7 @@ from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google.oauth2 import id_token
 from .utils.json_utils import load_json, save_json
+from .profiling import profile_section
 
 class GoogleAuthenticator:
     """
@@ -24,11 +25,13 @@ class GoogleAuthenticator:
         Returns:
             bool: True if authentication is successful, False otherwise.
         """
-        self.__load_or_refresh_credentials()
+        with profile_section("load or refresh credentials", kind="network"):
+            self.__load_or_refresh_credentials()
         
         if self.credentials and self.credentials.valid:
             try:
-                self.user_id = self.__extract_user_id()
+                with profile_section("verify ID token", kind="network"):
+                    self.user_id = self.__extract_user_id()
                 self.__store_user_id(self.user_id)
                 return True
             except Exception as e:
@@ -0,0 +1,226 @@
+import asyncio
+import csv
+import os
+import re
+from collections import deque
+from colorama import Fore, Style
+
+"""
+    Notes:
+    Files are translated without loading them into memory: lines are read one
+    at a time and grouped into numbered batches bounded by line count and
+    characters. Batches are sent through AsyncOpenAIClient (which bounds the
+    number of requests in flight), and at most a fixed window of batches is
+    pending at once. Results are written in input order as soon as every
+    earlier batch is done, so the output file grows while the translation runs.
+    Lines already in the translation cache are not sent again. When a reply
+    does not contain exactly one numbered translation per line, the lines of
+    that batch are translated one by one instead; when the request itself
+    fails (after the scheduler's retries), the lines of the batch are counted
+    as failed rather than sent again one by one.
+    """
+
+BATCH_PROMPT = """
+        You are a highly skilled translator fluent in both English and Arabic. Translate every numbered line below to the other language:
+        if a line is in Arabic, translate it to English; if it is in English, translate it to Arabic.
+        Reply with exactly the same numbered lines, in the same order, one translation per line, keeping each number.
+        Do not include any additional information or commentary.
+
+        {lines}
+        """
+
+NUMBERED_LINE = re.compile(r'^\s*(\d+)[.)]\s?(.*)$')
+
+
+def parse_numbered_lines(reply: str, count: int) -> list[str]:
+    """
+    Extract the translations from a numbered reply.
+
+    Args:
+        reply (str): The model's reply.
+        count (int): The number of lines that were sent.
+
+    Returns:
+        list[str]: The translations in order, or None if the reply does not hold exactly lines 1 to count.
+    """
+    translations = {}
+    for line in reply.splitlines():
+        match = NUMBERED_LINE.match(line)
+        if match:
+            translations[int(match.group(1))] = match.group(2).strip()
+    if sorted(translations) != list(range(1, count + 1)):
+        return None
+    return [translations[number] for number in range(1, count + 1)]
+
+
+class BatchTranslator:
+    """
+    Translates text and CSV files line by line with batched, concurrent requests.
+
+    Attributes:
+        async_client (AsyncOpenAIClient): Sends the translation requests.
+        translation_cache (TranslationCache): Serves and stores single-line translations, or None.
+        max_lines (int): The maximum number of lines per request.
+        max_chars (int): The maximum number of characters per request.
+        max_pending (int): The maximum number of batches in flight or waiting to be written.
+    """
+
+    def __init__(self, async_client, translation_cache=None, max_lines: int = 40, max_chars: int = 2000, max_pending: int = 16):
+        self.async_client = async_client
+        self.translation_cache = translation_cache
+        self.max_lines: int = max_lines
+        self.max_chars: int = max_chars
+        self.max_pending: int = max_pending
+
+    def translate_file(self, input_file: str, output_file: str, column=None, on_progress=None) -> dict:
+        """
+        Translate a file line by line.
+
+        Text files get one translation per input line. CSV files are written back
+        with a "translation" column appended; the translated column is column.
+
+        Args:
+            input_file (str): The .txt or .csv file to translate.
+            output_file (str): The file to write.
+            column (int | str, optional): For CSV files, the index or header name of the
+                column to translate. Defaults to the first column.
+            on_progress (callable, optional): Called with the number of lines written so far.
+
+        Returns:
+            dict: The number of lines translated, served from the cache, empty and failed.
+
+        Raises:
+            ValueError: If output_file is input_file, or the CSV column does not exist.
+        """
+        return self.async_client.run(self.translate_file_async(input_file, output_file, column, on_progress))
+
+    async def translate_file_async(self, input_file: str, output_file: str, column=None, on_progress=None) -> dict:
+        """Asynchronous version of translate_file."""
+        if os.path.abspath(output_file) == os.path.abspath(input_file) or (
+                os.path.exists(output_file) and os.path.samefile(output_file, input_file)):
+            # Opening the output would truncate the input before it is read
+            raise ValueError("The output file must be different from the input file.")
+        is_csv = os.path.splitext(input_file)[1].lower() == ".csv"
+        with open(input_file, newline="" if is_csv else None, encoding="utf-8-sig") as source, \
+                open(output_file, "w", newline="" if is_csv else None, encoding="utf-8") as target:
+            if is_csv:
+                reader = csv.reader(source)
+                writer = csv.writer(target)
+                header = next(reader, None)
+                if header is None:
+                    return self.__new_stats()
+                index = self.__column_index(header, column)
+                writer.writerow(header + ["translation"])
+                rows = ((row, row[index] if index < len(row) else "") for row in reader)
+
+                def write(row, translation):
+                    writer.writerow(row + [translation])
+            else:
+                rows = ((None, line.rstrip("\r\n")) for line in source)
+
+                def write(row, translation):
+                    target.write(translation + "\n")
+
+            return await self.__translate_rows(rows, write, target, on_progress)
+
+    @staticmethod
+    def __column_index(header: list, column) -> int:
+        if column is None:
+            return 0
+        if isinstance(column, int) or str(column).isdigit():
+            return int(column)
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found in the CSV header: {header}")
+        return header.index(column)
+
+    @staticmethod
+    def __new_stats() -> dict:
+        return {"translated": 0, "cached": 0, "empty": 0, "failed": 0}
+
+    async def __batches(self, rows, stats: dict):
+        """
+        Group rows into batches of (row, text, translation) entries, where
+        translation is already known for empty and cached lines.
+        """
+        batch = []
+        size = 0
+        for row, text in rows:
+            text = " ".join(text.split())
+            translation = None
+            if not text:
+                translation = ""
+                stats["empty"] += 1
+            elif self.translation_cache:
+                # SQLite calls block, so they run off the event loop
+                translation = await asyncio.to_thread(self.translation_cache.get, text)
+                if translation is not None:
+                    stats["cached"] += 1
+
+            if translation is None and batch and (len(batch) >= self.max_lines or size + len(text) > self.max_chars):
+                yield batch
+                batch = []
+                size = 0
+            batch.append([row, text, translation])
+            if translation is None:
+                size += len(text)
+        if batch:
+            yield batch
+
+    async def __translate_rows(self, rows, write, target, on_progress) -> dict:
+        stats = self.__new_stats()
+        pending: deque = deque()
+        written = 0
+
+        async def flush(wait: bool):
+            nonlocal written
+            while pending and (wait or pending[0].done()):
+                batch = await pending.popleft()
+                for row, _, translation in batch:
+                    # A translation spanning several lines would shift every later line of a text file
+                    write(row, " ".join(translation.split()))
+                written += len(batch)
+                target.flush()
+                if on_progress:
+                    on_progress(written)
+                wait = False
+
+        async for batch in self.__batches(rows, stats):
+            pending.append(asyncio.ensure_future(self.__translate_batch(batch, stats)))
+            if len(pending) >= self.max_pending:
+                await flush(wait=True)
+            else:
+                await flush(wait=False)
+        while pending:
+            await flush(wait=True)
+        return stats
+
+    async def __translate_batch(self, batch: list, stats: dict) -> list:
+        """Fill in the missing translations of a batch."""
+        missing = [entry for entry in batch if entry[2] is None]
+        if not missing:
+            return batch
+
+        translations = None
+        if len(missing) > 1:
+            numbered = "\n".join(f"{number}. {entry[1]}" for number, entry in enumerate(missing, 1))
+            reply = await self.async_client.get_response(BATCH_PROMPT.format(lines=numbered), [], is_translation=True)
+            if reply.startswith(Fore.RED):
+                # The request failed after the scheduler's retries; per-line requests to the same endpoint would too
+                translations = [reply] * len(missing)
+            else:
+                translations = parse_numbered_lines(reply, len(missing))
+        if translations is None:
+            # Single line or malformed batch: translate the lines one by one
+            translations = await asyncio.gather(*(self.async_client.get_translation(entry[1]) for entry in missing))
+
+        for entry, translation in zip(missing, translations):
+            if translation.startswith(Fore.RED):
+                print(f"{Fore.RED}Could not translate '{entry[1][:40]}': {translation}{Style.RESET_ALL}")
+                entry[2] = ""
+                stats["failed"] += 1
+                continue
+            entry[2] = translation.strip()
+            stats["translated"] += 1
+            if self.translation_cache:
+                await asyncio.to_thread(self.translation_cache.put, entry[1], entry[2])
+        return batch
@@ -0,0 +1,82 @@
+import threading
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+import httpx
+from .config import get_setting
+
+"""
+    Notes:
+    Every component shares one configured OpenAI client (and one AsyncOpenAI
+    client), so all chat, transcription and text-to-speech calls reuse the same
+    keep-alive connection pool instead of each paying its own TLS handshakes.
+    Pool limits and timeouts are read from the environment / .env:
+    - ENGLISH_PRACTICE_HTTP_MAX_CONNECTIONS (default 20)
+    - ENGLISH_PRACTICE_HTTP_MAX_KEEPALIVE (default 10)
+    - ENGLISH_PRACTICE_HTTP_KEEPALIVE_SECONDS (default 60)
+    - ENGLISH_PRACTICE_HTTP_TIMEOUT_SECONDS (default 60)
+    - ENGLISH_PRACTICE_HTTP_CONNECT_TIMEOUT_SECONDS (default 10)
+    OPENAI_BASE_URL, if set, points both clients at another endpoint.
+    The SDK's retries are disabled: the RequestScheduler retries failed requests.
+    The async client must only be used from a single event loop.
+    """
+
+_lock = threading.Lock()
+_clients: dict = {}
+
+
+def _api_key() -> str:
+    api_key = get_setting("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("The OPENAI_API_KEY environment variable is not set.")
+    return api_key
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=get_setting("ENGLISH_PRACTICE_HTTP_MAX_CONNECTIONS", 20, int),
+        max_keepalive_connections=get_setting("ENGLISH_PRACTICE_HTTP_MAX_KEEPALIVE", 10, int),
+        keepalive_expiry=get_setting("ENGLISH_PRACTICE_HTTP_KEEPALIVE_SECONDS", 60.0, float)
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        get_setting("ENGLISH_PRACTICE_HTTP_TIMEOUT_SECONDS", 60.0, float),
+        connect=get_setting("ENGLISH_PRACTICE_HTTP_CONNECT_TIMEOUT_SECONDS", 10.0, float)
+    )
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Return the process-wide OpenAI client, creating it on first use.
+
+    Raises:
+        ValueError: If the OPENAI_API_KEY environment variable is not set.
+    """
+    with _lock:
+        if "sync" not in _clients:
+            _clients["sync"] = OpenAI(
+                api_key=_api_key(),
+                base_url=get_setting("OPENAI_BASE_URL"),
+                max_retries=0,
+                http_client=DefaultHttpxClient(limits=_limits(), timeout=_timeout())
+            )
+        return _clients["sync"]
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client, creating it on first use.
+
+    Raises:
+        ValueError: If the OPENAI_API_KEY environment variable is not set.
+    """
+    with _lock:
+        if "async" not in _clients:
+            _clients["async"] = AsyncOpenAI(
+                api_key=_api_key(),
+                base_url=get_setting("OPENAI_BASE_URL"),
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout())
+            )
+        return _clients["async"]
+
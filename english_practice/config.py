@@ -0,0 +1,39 @@
+import os
+from dotenv import load_dotenv
+
+"""
+    Notes:
+    Application settings are read from environment variables, which may also be
+    provided through the .env file (the same file that holds OPENAI_API_KEY).
+    """
+
+_env_loaded: bool = False
+
+
+def get_setting(name: str, default=None, cast=str):
+    """
+    Read a setting from the environment.
+
+    Args:
+        name (str): The environment variable name.
+        default: The value returned when the variable is unset, empty or invalid.
+        cast (callable, optional): Converts the raw string value. Defaults to str.
+
+    Returns:
+        The converted setting value, or default.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    if cast is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}. Using default {default!r}.")
+        return default
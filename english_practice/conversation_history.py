@@ -0,0 +1,114 @@
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to an estimate of ~4 characters per token
+    tiktoken = None
+
+"""
+    Notes:
+    Each practice session gets its own ConversationHistory, so earlier sessions
+    are never re-sent. The history is kept within a token budget: when the turns
+    exceed max_tokens, the oldest turns (all but the most recent keep_recent_turns)
+    are either dropped or, if a summarizer is given, folded into a running summary
+    that is sent as a single system message in their place.
+    The budget only applies to the per-exchange requests: the feedback at the
+    end of a session is about the user's English, so feedback_messages() still
+    includes every user turn, including the dropped or summarized ones.
+    """
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of text for the chat model, or estimate them without tiktoken.
+    """
+    global _encoding
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text))
+
+
+class ConversationHistory:
+    """
+    The turns of one practice session, kept within a token budget.
+
+    Attributes:
+        max_tokens (int): The token budget for the turns and the summary together.
+        keep_recent_turns (int): The number of latest turns that are never dropped or summarized.
+        summarize (callable): Optional; receives the current summary and the text of the
+            turns being removed and returns the new summary.
+        summary (str): The summary of the removed turns, if any.
+    """
+
+    # Per-message overhead of the chat format (role and separators)
+    MESSAGE_OVERHEAD_TOKENS = 4
+
+    def __init__(self, max_tokens: int = 3000, keep_recent_turns: int = 6, summarize=None):
+        self.max_tokens: int = max_tokens
+        self.keep_recent_turns: int = keep_recent_turns
+        self.summarize = summarize
+        self.summary: str = ""
+        self.__turns: list[dict] = []
+        self.__turn_tokens: list[int] = []
+        self.__removed_user_turns: list[dict] = []
+
+    def add(self, role: str, content: str) -> None:
+        """
+        Append a turn and enforce the token budget.
+
+        Args:
+            role (str): "user" or "assistant".
+            content (str): The text of the turn.
+        """
+        self.__turns.append({"role": role, "content": content})
+        self.__turn_tokens.append(count_tokens(content) + self.MESSAGE_OVERHEAD_TOKENS)
+        self.__enforce_budget()
+
+    def messages(self) -> list[dict]:
+        """
+        Return the messages to send with the next request.
+        """
+        if not self.summary:
+            return list(self.__turns)
+        return [self.__summary_message()] + self.__turns
+
+    def feedback_messages(self) -> list[dict]:
+        """
+        Return the messages to base the session feedback on.
+
+        These are messages() plus every user turn removed to stay within the budget,
+        in conversation order; removed assistant turns are left out (or summarized).
+        """
+        summary = [self.__summary_message()] if self.summary else []
+        return summary + self.__removed_user_turns + self.__turns
+
+    def token_count(self) -> int:
+        """
+        Return the number of tokens that messages() currently amounts to.
+        """
+        summary_tokens = count_tokens(self.__summary_message()["content"]) + self.MESSAGE_OVERHEAD_TOKENS if self.summary else 0
+        return sum(self.__turn_tokens) + summary_tokens
+
+    def __summary_message(self) -> dict:
+        return {"role": "system", "content": f"Summary of the earlier part of this conversation: {self.summary}"}
+
+    def __enforce_budget(self) -> None:
+        removable = len(self.__turns) - self.keep_recent_turns
+        if self.token_count() <= self.max_tokens or removable <= 0:
+            return
+
+        removed_turns = []
+        while removable > 0 and self.token_count() > self.max_tokens:
+            removed_turns.append(self.__turns.pop(0))
+            self.__turn_tokens.pop(0)
+            removable -= 1
+        self.__removed_user_turns.extend(turn for turn in removed_turns if turn["role"] == "user")
+
+        if self.summarize is not None:
+            removed_text = "\n".join(f"{turn['role']}: {turn['content']}" for turn in removed_turns)
+            try:
+                self.summary = self.summarize(self.summary, removed_text)
+            except Exception as e:
+                print(f"Error summarizing conversation history: {e}")
@@ -2,7 +2,7 @@ import json
 from datetime import datetime
 from colorama import Fore, Style
 from .authentication import GoogleAuthenticator
-from .utils.json_utils import load_json, save_json
+from .utils.storage import get_storage, FEEDBACK
 
 class FeedbackManager:
     """
@@ -10,14 +10,15 @@ class FeedbackManager:
     Provides functionality to save and display feedback for individual users.
     """
 
-    def __init__(self, filename: str = "db/english_practice_feedback.json"):
+    def __init__(self, collection: str = FEEDBACK):
         """
-        Initialize the FeedbackManager with a filename for storing feedback.
+        Initialize the FeedbackManager with a storage collection for feedback.
 
         Args:
-            filename (str): Name of the file to store feedback data. Defaults to "english_practice_feedback.json".
+            collection (str): Name of the storage collection for feedback data. Defaults to "english_practice_feedback".
         """
-        self.filename: str = filename
+        self.collection: str = collection
+        self.storage = get_storage()
         self.user_id: str = None
         try:
             self.user_id = GoogleAuthenticator().get_stored_user_id()
@@ -27,7 +28,7 @@ class FeedbackManager:
 
     def save_feedback(self, feedback: str) -> None:
         """
-        Save the provided feedback to the file for the current user.
+        Save the provided feedback to storage for the current user.
 
         Args:
             feedback (str): The feedback to save.
@@ -45,11 +46,7 @@ class FeedbackManager:
         }
 
         try:
-            existing_data = load_json(self.filename)
-            if not isinstance(existing_data, dict):
-                existing_data = {}
-            existing_data.setdefault(self.user_id, []).append(new_feedback)
-            save_json(self.filename, existing_data)
+            self.storage.add_record(self.collection, self.user_id, new_feedback)
             print(f"{Fore.GREEN}Feedback saved successfully.{Style.RESET_ALL}")
         except IOError as e:
             print(f"{Fore.RED}Error saving feedback: {e}{Style.RESET_ALL}")
@@ -58,7 +55,7 @@ class FeedbackManager:
 
     def display_feedbacks(self, is_for_report: bool = False) -> list:
         """
-        Display all feedbacks stored in the file for the current user.
+        Display all feedbacks stored for the current user.
 
         Returns:
             list: A list of feedback dictionaries for the current user.
@@ -71,12 +68,7 @@ class FeedbackManager:
             return []
 
         try:
-            feedbacks = load_json(self.filename)
-            if not isinstance(feedbacks, dict):
-                print(f"{Fore.YELLOW}No valid feedback data found.{Style.RESET_ALL}")
-                return []
-            
-            user_feedbacks = feedbacks.get(self.user_id, [])
+            user_feedbacks = self.storage.get_records(self.collection, self.user_id)
             if is_for_report:
                 return user_feedbacks
             else:
@@ -0,0 +1,226 @@
+import bisect
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from .config import get_setting
+
+"""
+    Notes:
+    Every chat, transcription and text-to-speech call records a CallRecord:
+    time to first byte, total latency, token usage, audio bytes, retries and
+    the outcome. Latencies are aggregated per endpoint into histograms with
+    exponentially growing buckets (each about 10% wider than the previous one),
+    so memory stays constant however many calls are made while p50/p95/p99 stay
+    accurate to within one bucket. The most recent records are kept in memory
+    for export as JSON lines; with ENGLISH_PRACTICE_METRICS_LOG set, every
+    record is also appended to that file as it happens.
+    For non-streamed calls the time to first byte equals the total latency.
+    """
+
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """
+    A histogram of durations in seconds with exponentially growing buckets.
+    """
+
+    def __init__(self, min_value: float = 0.001, max_value: float = 600.0, growth: float = 1.1):
+        count = math.ceil(math.log(max_value / min_value, growth))
+        self.bounds: list[float] = [min_value * growth ** i for i in range(count + 1)]
+        self.counts: list[int] = [0] * (len(self.bounds) + 1)
+        self.total: int = 0
+        self.sum: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def percentile(self, percent: float) -> float:
+        """
+        Return the upper bound of the bucket holding the given percentile, or None if empty.
+        """
+        if not self.total:
+            return None
+        rank = math.ceil(self.total * percent / 100)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[min(index, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+
+@dataclass
+class CallRecord:
+    """
+    The measurements of one API call.
+
+    Attributes:
+        endpoint (str): "chat", "transcription" or "speech".
+        model (str): The model used.
+        started_at (float): The Unix time the call started.
+        time_to_first_byte (float): Seconds until the first part of the response arrived.
+        latency (float): Seconds until the call completed.
+        prompt_tokens (int): Tokens sent (chat only).
+        completion_tokens (int): Tokens received (chat only).
+        audio_bytes (int): Audio uploaded (transcription) or received (speech).
+        retries (int): How often the request was retried.
+        error (str): The error, if the call failed.
+    """
+    endpoint: str
+    model: str
+    started_at: float = field(default_factory=time.time)
+    time_to_first_byte: float = None
+    latency: float = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    audio_bytes: int = 0
+    retries: int = 0
+    error: str = None
+
+    def __post_init__(self):
+        # Not a field, so it is left out of exports
+        self._clock_start: float = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Return the seconds since the call started."""
+        return time.perf_counter() - self._clock_start
+
+    def first_byte(self) -> None:
+        """Mark the arrival of the first part of the response (only the first mark counts)."""
+        if self.time_to_first_byte is None:
+            self.time_to_first_byte = self.elapsed()
+
+    def retried(self, *args) -> None:
+        """Count a retry; usable as the scheduler's on_retry callback."""
+        self.retries += 1
+
+
+class CallMetrics:
+    """
+    Aggregates CallRecords per endpoint.
+
+    Attributes:
+        log_file (str): A JSON lines file every record is appended to, or None.
+        recent (deque): The most recent records.
+    """
+
+    def __init__(self, log_file: str = None, max_recent: int = 5000):
+        self.log_file: str = log_file
+        self.recent: deque = deque(maxlen=max_recent)
+        self.__lock = threading.Lock()
+        self.__endpoints: dict = {}
+
+    @contextmanager
+    def track(self, endpoint: str, model: str):
+        """
+        Measure the enclosed API call.
+
+        Yields a CallRecord that the caller completes (first_byte(), token counts,
+        audio bytes, retries); latency and errors are filled in on exit.
+        """
+        record = CallRecord(endpoint, model)
+        try:
+            yield record
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.latency = record.elapsed()
+            if record.time_to_first_byte is None and record.error is None:
+                record.time_to_first_byte = record.latency
+            self.add(record)
+
+    def add(self, record: CallRecord) -> None:
+        with self.__lock:
+            stats = self.__endpoints.setdefault(record.endpoint, {
+                "calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0, "audio_bytes": 0,
+                "time_to_first_byte": Histogram(), "latency": Histogram()
+            })
+            stats["calls"] += 1
+            stats["errors"] += record.error is not None
+            stats["retries"] += record.retries
+            stats["prompt_tokens"] += record.prompt_tokens
+            stats["completion_tokens"] += record.completion_tokens
+            stats["audio_bytes"] += record.audio_bytes
+            if record.error is None:
+                stats["time_to_first_byte"].add(record.time_to_first_byte)
+                stats["latency"].add(record.latency)
+            self.recent.append(record)
+
+            if self.log_file:
+                try:
+                    with open(self.log_file, 'a') as file:
+                        file.write(json.dumps(asdict(record)) + "\n")
+                except IOError as e:
+                    print(f"Error writing API metrics to {self.log_file}: {e}")
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: Per endpoint, the call, error and retry counts, the token and audio
+            totals, and p50/p95/p99 of the time to first byte and latency in milliseconds.
+        """
+        with self.__lock:
+            result = {}
+            for endpoint, stats in sorted(self.__endpoints.items()):
+                row = {name: value for name, value in stats.items() if not isinstance(value, Histogram)}
+                for name in ("time_to_first_byte", "latency"):
+                    for percent in PERCENTILES:
+                        value = stats[name].percentile(percent)
+                        row[f"{name}_p{percent}_ms"] = None if value is None else value * 1000
+                result[endpoint] = row
+            return result
+
+    def print_report(self) -> None:
+        summary = self.summary()
+        if not summary:
+            print("No API calls have been made yet.")
+            return
+
+        def ms(value):
+            return "-" if value is None else f"{value:.0f}"
+
+        print(f"{'endpoint':<15}{'calls':>6}{'errors':>7}{'retries':>8}"
+              f"{'ttfb p50/p95/p99 ms':>24}{'latency p50/p95/p99 ms':>26}{'tokens in/out':>16}{'audio KB':>10}")
+        for endpoint, row in summary.items():
+            ttfb = "/".join(ms(row[f"time_to_first_byte_p{p}_ms"]) for p in PERCENTILES)
+            latency = "/".join(ms(row[f"latency_p{p}_ms"]) for p in PERCENTILES)
+            tokens = f"{row['prompt_tokens']}/{row['completion_tokens']}"
+            print(f"{endpoint:<15}{row['calls']:>6}{row['errors']:>7}{row['retries']:>8}"
+                  f"{ttfb:>24}{latency:>26}{tokens:>16}{row['audio_bytes'] / 1024:>10.1f}")
+
+    def export_jsonl(self, filename: str) -> int:
+        """
+        Write the recent records to a JSON lines file.
+
+        Returns:
+            int: The number of records written.
+        """
+        with self.__lock:
+            records = list(self.recent)
+        with open(filename, 'w') as file:
+            for record in records:
+                file.write(json.dumps(asdict(record)) + "\n")
+        return len(records)
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> CallMetrics:
+    """
+    Return the process-wide CallMetrics, logging to ENGLISH_PRACTICE_METRICS_LOG if set.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = CallMetrics(get_setting("ENGLISH_PRACTICE_METRICS_LOG"))
+        return _metrics
@@ -1,7 +1,168 @@
 from openai import OpenAI, OpenAIError
 import os
-from dotenv import load_dotenv
+import time
+from dataclasses import dataclass
 from colorama import Fore, Style
+from .config import get_setting
+from .client_registry import get_openai_client
+from .translation_cache import TranslationCache
+from .audio_cache import AudioCache, get_audio_cache
+from .request_scheduler import RequestScheduler, get_scheduler
+from .metrics import CallMetrics, get_metrics
+
+CHAT_MODEL: str = "gpt-3.5-turbo-0125"
+TRANSCRIPTION_MODEL: str = "whisper-1"
+TTS_MODEL: str = "tts-1"
+
+TRANSLATOR_SYSTEM_PROMPT: str = "You are a translator."
+
+REPORT_SYSTEM_PROMPT: str = """You are a report writer in English practice system,
+                 you are tasked to write markdown report for the user's progress and activities. 
+                 You are given a prompt and the user's history,
+                 you are tasked to write a markdown report for the user's progress and activities.
+                 You are given a prompt of some activities to the user, such as AI Feedbacks, Results of Vocabulary Quiz, and Achievements.
+                 You are tasked to write a markdown report for the user's progress and activities. (ONLY markdown ANSWER! DO NOT WRITE ANYTHING ELSE!)
+                 
+                 """
+
+TUTOR_SYSTEM_PROMPT: str = "You are Lana, a friendly and relatable English tutor in a conversational app with audio. Your responses will be converted to speech using a text-to-speech system. Your goal is to help the user practice English in an engaging and natural way. Ask various interesting questions that encourage the user to talk a lot and maintain a casual atmosphere throughout the conversation. Use informal language and expressions like 'Oh, that's cool!' or 'I've tried that before!' to make the conversation feel more natural. Occasionally, when appropriate, add a touch of humor to keep things light. The session should have exactly 7 exchanges, with the last exchange being a friendly goodbye to the user."
+
+FEEDBACK_PROMPT: str = """
+        As Lana, the friendly and professional English tutor in a conversational app with audio,
+        provide a comprehensive and constructive evaluation of the entire conversation. Be honest but kind in your assessment.
+        Focus on the user's grammar, vocabulary, pronunciation, and overall language skills.
+        Offer a rating out of 10 for each of these areas.
+        Highlight specific areas for improvement with examples from the conversation. 
+        Provide actionable advice for future practice sessions, tailored to the user's current level. 
+        If the user's responses are too brief, incoherent, or insufficient for meaningful feedback (e.g., one-word answers or responses that cannot be evaluated), do not provide a rating. 
+        Instead, kindly inform the user that there wasn't enough material to provide a detailed assessment and encourage them to engage more in future sessions.
+        End with an encouraging and motivating message to inspire continued learning and improvement.
+        
+        When evaluating pronunciation, consider any mispronounced words that were transcribed with correct spellings in [square brackets].
+        For example, if you see 'super-market [supermarket]' or 'veg-tables [vegetables]', this indicates a pronunciation error.
+        Also, pay attention to filler words, hesitations, and unclear pronunciations that might be represented phonetically.
+        For instance, 'wether [weather]' or 'tem-per-a-chur [temperature]' indicate pronunciation challenges.
+        Include these observations in your feedback to help the user improve their pronunciation.
+        """
+
+FEEDBACK_SECTION_PROMPT: str = """
+        As Lana, the friendly and professional English tutor in a conversational app with audio,
+        write one section of the evaluation of the entire conversation: {focus}
+        Be honest but kind, and use examples from the conversation.
+        If the user's responses are too brief, incoherent, or insufficient for meaningful feedback, do not provide a rating; say so in one sentence instead.
+        This section will be joined with the other sections, so do not greet the user, do not add a heading and do not write a closing message unless asked to.
+        """
+
+# Sections of the feedback that can be generated in parallel, in the order they are presented
+FEEDBACK_SECTIONS: list[tuple[str, str]] = [
+    ("Grammar", "the user's grammar. Offer a rating out of 10, point out specific mistakes and show the corrected sentences."),
+    ("Vocabulary", "the user's vocabulary. Offer a rating out of 10, comment on the range and accuracy of the words used and suggest better words or expressions."),
+    ("Pronunciation", "the user's pronunciation. Offer a rating out of 10. Mispronounced words were transcribed with the correct spelling in [square brackets], "
+                      "e.g. 'veg-tables [vegetables]'; filler words, hesitations and phonetic spellings such as 'wether [weather]' also indicate pronunciation challenges."),
+    ("Next Steps", "actionable advice for future practice sessions, tailored to the user's current level. End with an encouraging and motivating message."),
+]
+
+
+@dataclass
+class ResponseDelta:
+    """
+    One piece of a streamed chat response.
+
+    Attributes:
+        text (str): The new text.
+        index (int): The position of the piece in the response, starting at 0.
+        elapsed (float): Seconds since the request was started (including queueing and retries).
+        time_to_first_token (float): Seconds from starting the request to the first piece.
+    """
+    text: str
+    index: int
+    elapsed: float
+    time_to_first_token: float
+
+
+def build_translation_prompt(text: str) -> str:
+    """
+    Build the prompt asking for an English <-> Arabic translation of text.
+    """
+    return f"""
+        You are a highly skilled translator fluent in both English and Arabic. Your task is to accurately translate the provided text from one language to the other.
+        If the text is in Arabic, translate it to English. If the text is in English, translate it to Arabic.
+        Ensure your translation is precise, concise, and captures the original meaning and tone of the text. Do not include any additional information or commentary.
+        Simply provide the translated text.
+        
+        Text to translate:
+        {text}
+        """
+
+
+def build_messages(prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False) -> list[dict]:
+    """
+    Build the chat messages: the system prompt for the request type, the history and the prompt.
+
+    Args:
+        prompt (str): The user's input prompt.
+        history (list, optional): The conversation history. Defaults to None.
+        is_translation (bool): Indicates if the request is for translation. Defaults to False.
+        is_extracting_report (bool): Indicates if the request is for extracting a report. Defaults to False.
+
+    Returns:
+        list[dict]: The messages to send to the chat completions API.
+    """
+    if is_translation:
+        system_prompt = TRANSLATOR_SYSTEM_PROMPT
+    elif is_extracting_report:
+        system_prompt = REPORT_SYSTEM_PROMPT
+    else:
+        system_prompt = TUTOR_SYSTEM_PROMPT
+
+    messages: list[dict] = [{"role": "system", "content": system_prompt}]
+    if history:
+        messages.extend(history)
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def read_audio(audio) -> tuple[str, bytes]:
+    """
+    Return the upload name and the bytes of a recording.
+
+    Args:
+        audio (str | bytes | file-like): A file name, WAV bytes, or a binary file object
+            such as the buffer returned by AudioRecorder.record_to_buffer.
+
+    Returns:
+        tuple[str, bytes]: The file name sent to the API (its extension tells the format) and the audio data.
+    """
+    if isinstance(audio, str):
+        with open(audio, "rb") as audio_file:
+            return os.path.basename(audio), audio_file.read()
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return "input.wav", bytes(audio)
+    return os.path.basename(getattr(audio, "name", None) or "input.wav"), audio.read()
+
+
+def cached_speech(audio_cache: AudioCache, text: str, voice: str, audio_format: str = "mp3") -> bytes:
+    """
+    Return the previously synthesized audio of an utterance.
+
+    Args:
+        audio_cache (AudioCache): The cache, or None if it is disabled.
+        text (str): The text that was converted to speech.
+        voice (str): The voice that was used.
+        audio_format (str, optional): The audio format, "mp3" or "pcm". Defaults to "mp3".
+
+    Returns:
+        bytes: The audio, or None if the utterance has not been synthesized yet.
+    """
+    return audio_cache.get(text, voice, TTS_MODEL, audio_format) if audio_cache else None
+
+
+def store_speech(audio_cache: AudioCache, text: str, voice: str, audio_data: bytes, audio_format: str = "mp3") -> None:
+    """
+    Keep synthesized audio for cached_speech; does nothing if the cache is disabled.
+    """
+    if audio_cache and audio_data:
+        audio_cache.put(text, voice, TTS_MODEL, audio_data, audio_format)
 
 
 class OpenAIClient:
@@ -14,6 +175,10 @@ class OpenAIClient:
     Attributes:
         api_key (str): The OpenAI API key.
         client (OpenAI): The OpenAI client instance.
+        translation_cache (TranslationCache): The on-disk translation cache, or None if disabled.
+        audio_cache (AudioCache): The on-disk cache of synthesized speech, or None if disabled.
+        scheduler (RequestScheduler): Applies rate limits, retries and deadlines to every request.
+        metrics (CallMetrics): Records the latency, token usage and retries of every request.
     """
 
     def __init__(self):
@@ -24,16 +189,23 @@ class OpenAIClient:
             ValueError: If the OPENAI_API_KEY environment variable is not set.
         """
         try:
-            load_dotenv()
-            self.api_key: str = os.getenv("OPENAI_API_KEY")
-            if not self.api_key:
-                raise ValueError(f"{Fore.RED}The OPENAI_API_KEY environment variable is not set.{Style.RESET_ALL}")
-            self.client: OpenAI = OpenAI(api_key=self.api_key)
+            self.client: OpenAI = get_openai_client()
+            self.api_key: str = self.client.api_key
+            self.scheduler: RequestScheduler = get_scheduler()
+            self.metrics: CallMetrics = get_metrics()
+            self.translation_cache: TranslationCache = None
+            if get_setting("ENGLISH_PRACTICE_TRANSLATION_CACHE", True, bool):
+                self.translation_cache = TranslationCache(
+                    get_setting("ENGLISH_PRACTICE_TRANSLATION_CACHE_PATH", "db/translation_cache.db"),
+                    get_setting("ENGLISH_PRACTICE_TRANSLATION_CACHE_SIZE", 5000, int),
+                    get_setting("ENGLISH_PRACTICE_TRANSLATION_CACHE_TTL_DAYS", 30.0, float) * 24 * 3600
+                )
+            self.audio_cache: AudioCache = get_audio_cache()
         except Exception as e:
             print(f"{Fore.RED}An error occurred during initialization: {e}{Style.RESET_ALL}")
             raise
 
-    def get_response(self, prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False) -> str:
+    def get_response(self, prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False, on_delta=None) -> str:
         """
         Generate a chat response using OpenAI's GPT model.
 
@@ -42,6 +214,7 @@ class OpenAIClient:
             history (list, optional): The conversation history. Defaults to None.
             is_translation (bool): Indicates if the request is for translation. Defaults to False.
             is_extracting_report (bool): Indicates if the request is for extracting a report. Defaults to False.
+            on_delta (callable, optional): Called with every ResponseDelta as it arrives.
 
         Returns:
             str: The generated response from the model.
@@ -49,123 +222,154 @@ class OpenAIClient:
         if self.client is None:
             return f"{Fore.RED}Error: OpenAI client is not initialized.{Style.RESET_ALL}"
 
-        if is_translation:
-            messages: list[dict] = [
-                {"role": "system", "content": "You are a translator."}
-            ]
-        elif is_extracting_report:
-            messages: list[dict] = [
-                {"role": "system",
-                 "content": 
-                """You are a report writer in English practice system,
-                 you are tasked to write markdown report for the user's progress and activities. 
-                 You are given a prompt and the user's history,
-                 you are tasked to write a markdown report for the user's progress and activities.
-                 You are given a prompt of some activities to the user, such as AI Feedbacks, Results of Vocabulary Quiz, and Achievements.
-                 You are tasked to write a markdown report for the user's progress and activities. (ONLY markdown ANSWER! DO NOT WRITE ANYTHING ELSE!)
-                 
-                 """}
-            ]
-        else:
-            messages: list[dict] = [
-                {"role": "system", "content": "You are Lana, a friendly and relatable English tutor in a conversational app with audio. Your responses will be converted to speech using a text-to-speech system. Your goal is to help the user practice English in an engaging and natural way. Ask various interesting questions that encourage the user to talk a lot and maintain a casual atmosphere throughout the conversation. Use informal language and expressions like 'Oh, that's cool!' or 'I've tried that before!' to make the conversation feel more natural. Occasionally, when appropriate, add a touch of humor to keep things light. The session should have exactly 7 exchanges, with the last exchange being a friendly goodbye to the user."}
-            ]
-        
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": prompt})
-
+        parts = []
         try:
-            response_stream = self.client.chat.completions.create(
-                model="gpt-3.5-turbo-0125",
-                messages=messages,
-                temperature=0.8,
-                stream=True  # Enable streaming
-            )
-            
-            full_response = ""
-            for chunk in response_stream:
-                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content is not None:
-                    full_response += chunk.choices[0].delta.content
-
-            
-            return full_response
+            for delta in self.stream_response_deltas(prompt, history, is_translation, is_extracting_report):
+                parts.append(delta.text)
+                if on_delta:
+                    on_delta(delta)
+            return "".join(parts)
         except OpenAIError as e:
             return f"{Fore.RED}An error occurred: {e}{Style.RESET_ALL}"
-        
-    def get_translation(self, text: str) -> str:
+
+    def stream_response(self, prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False):
+        """
+        Generate a chat response and yield it piece by piece as it is streamed.
+
+        Takes the same arguments as get_response.
+
+        Yields:
+            str: The next piece of the response text.
+
+        Raises:
+            OpenAIError: If the request fails; RequestFailedError once retries or the deadline are exhausted.
+        """
+        for delta in self.stream_response_deltas(prompt, history, is_translation, is_extracting_report):
+            yield delta.text
+
+    def stream_response_deltas(self, prompt: str, history: list = None, is_translation: bool = False, is_extracting_report: bool = False):
+        """
+        Generate a chat response and yield its pieces with timing information.
+
+        Takes the same arguments as get_response.
+
+        Yields:
+            ResponseDelta: The next piece of the response text.
+
+        Raises:
+            OpenAIError: If the request fails; RequestFailedError once retries or the deadline are exhausted.
+        """
+        start = time.perf_counter()
+        messages = build_messages(prompt, history, is_translation, is_extracting_report)
+        with self.metrics.track("chat", CHAT_MODEL) as call:
+            response_stream = self.scheduler.call("chat", lambda timeout: self.client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=0.8,
+                stream=True,  # Enable streaming
+                stream_options={"include_usage": True},
+                timeout=timeout
+            ), on_retry=call.retried, stream=True)
+
+            index = 0
+            time_to_first_token = None
+            try:
+                for chunk in response_stream:
+                    if chunk.usage:
+                        call.prompt_tokens = chunk.usage.prompt_tokens
+                        call.completion_tokens = chunk.usage.completion_tokens
+                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                        elapsed = time.perf_counter() - start
+                        if time_to_first_token is None:
+                            time_to_first_token = elapsed
+                            call.first_byte()
+                        yield ResponseDelta(chunk.choices[0].delta.content, index, elapsed, time_to_first_token)
+                        index += 1
+            finally:
+                # Frees the request slot if the caller stops reading early
+                response_stream.close()
+
+    def get_translation(self, text: str, on_delta=None) -> str:
         """
         Translate text to English using OpenAI's GPT model.
+
+        Translations are served from the translation cache when possible; on_delta
+        is then not called.
+
+        Args:
+            text (str): The text to translate.
+            on_delta (callable, optional): Called with every ResponseDelta as it arrives.
         """
         if not text:
             return f"{Fore.RED}No text to translate.{Style.RESET_ALL}"
-        
-        prompt:str = f"""
-        You are a highly skilled translator fluent in both English and Arabic. Your task is to accurately translate the provided text from one language to the other.
-        If the text is in Arabic, translate it to English. If the text is in English, translate it to Arabic.
-        Ensure your translation is precise, concise, and captures the original meaning and tone of the text. Do not include any additional information or commentary.
-        Simply provide the translated text.
-        
-        Text to translate:
-        {text}
-        """
-     
-        return self.get_response(prompt, [], is_translation=True)
 
-    def get_feedback(self, history: list) -> str:
+        def translate():
+            return self.get_response(build_translation_prompt(text), [], is_translation=True, on_delta=on_delta)
+
+        if self.translation_cache is None:
+            return translate()
+        # Error messages are returned as red text and must not be cached
+        return self.translation_cache.get_or_translate(text, translate, lambda translation: not translation.startswith(Fore.RED))
+
+    def get_feedback(self, history: list, on_delta=None) -> str:
         """
         Generate feedback on the conversation using OpenAI's GPT model.
 
         Args:
             history (list): The conversation history.
+            on_delta (callable, optional): Called with every ResponseDelta as it arrives.
 
         Returns:
             str: The generated feedback.
         """
-        feedback_prompt: str = """
-        As Lana, the friendly and professional English tutor in a conversational app with audio,
-        provide a comprehensive and constructive evaluation of the entire conversation. Be honest but kind in your assessment.
-        Focus on the user's grammar, vocabulary, pronunciation, and overall language skills.
-        Offer a rating out of 10 for each of these areas.
-        Highlight specific areas for improvement with examples from the conversation. 
-        Provide actionable advice for future practice sessions, tailored to the user's current level. 
-        If the user's responses are too brief, incoherent, or insufficient for meaningful feedback (e.g., one-word answers or responses that cannot be evaluated), do not provide a rating. 
-        Instead, kindly inform the user that there wasn't enough material to provide a detailed assessment and encourage them to engage more in future sessions.
-        End with an encouraging and motivating message to inspire continued learning and improvement.
-        
-        When evaluating pronunciation, consider any mispronounced words that were transcribed with correct spellings in [square brackets].
-        For example, if you see 'super-market [supermarket]' or 'veg-tables [vegetables]', this indicates a pronunciation error.
-        Also, pay attention to filler words, hesitations, and unclear pronunciations that might be represented phonetically.
-        For instance, 'wether [weather]' or 'tem-per-a-chur [temperature]' indicate pronunciation challenges.
-        Include these observations in your feedback to help the user improve their pronunciation.
-        """
-        
-        return self.get_response(feedback_prompt, history)
+        return self.get_response(FEEDBACK_PROMPT, history, on_delta=on_delta)
     
-    def get_report(self, prompt: str) -> str:
-       
-        return self.get_response(prompt, [], is_extracting_report=True)
+    def stream_feedback(self, history: list):
+        """
+        Generate feedback on the conversation and yield it piece by piece as it is streamed.
+
+        Raises:
+            OpenAIError: If the request fails.
+        """
+        return self.stream_response(FEEDBACK_PROMPT, history)
+
+    def get_report(self, prompt: str, on_delta=None) -> str:
+        """
+        Generate a markdown progress report using OpenAI's GPT model.
+
+        Args:
+            prompt (str): The report prompt, including the user's activities.
+            on_delta (callable, optional): Called with every ResponseDelta as it arrives.
+
+        Returns:
+            str: The markdown report.
+        """
+        return self.get_response(prompt, [], is_extracting_report=True, on_delta=on_delta)
 
-    def transcribe_audio(self, filename: str = "input.wav") -> str:
+    def transcribe_audio(self, audio="input.wav") -> str:
         """
-        Transcribe an audio file using OpenAI's Whisper model.
+        Transcribe a recording using OpenAI's Whisper model.
 
         Args:
-            filename (str, optional): The name of the audio file to transcribe. Defaults to "input.wav".
+            audio (str | bytes | file-like, optional): The audio file to transcribe, or the
+                recording itself (see read_audio). Defaults to "input.wav".
 
         Returns:
             str: The transcribed text or an error message.
         """
-        if not os.path.exists(filename):
-            return f"{Fore.RED}Error: Audio file '{filename}' not found.{Style.RESET_ALL}"
+        if isinstance(audio, str) and not os.path.exists(audio):
+            return f"{Fore.RED}Error: Audio file '{audio}' not found.{Style.RESET_ALL}"
 
         try:
-            with open(filename, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1", 
-                    file=audio_file,
-                    language="en"
-                )
+            upload_name, audio_data = read_audio(audio)
+            with self.metrics.track("transcription", TRANSCRIPTION_MODEL) as call:
+                call.audio_bytes = len(audio_data)
+                transcript = self.scheduler.call("transcription", lambda timeout: self.client.audio.transcriptions.create(
+                    model=TRANSCRIPTION_MODEL,
+                    file=(upload_name, audio_data),
+                    language="en",
+                    timeout=timeout
+                ), on_retry=call.retried)
             return transcript.text
         except Exception as e:
             error_message = f"{Fore.RED}An error occurred during audio transcription: {e}{Style.RESET_ALL}"
@@ -176,6 +380,8 @@ class OpenAIClient:
         """
         Convert text to speech using OpenAI's text-to-speech model.
 
+        Previously synthesized utterances are served from the audio cache.
+
         Args:
             text (str): The text to convert to speech.
             voice (str, optional): The voice to use for text-to-speech. Defaults to "nova".
@@ -183,15 +389,64 @@ class OpenAIClient:
         Returns:
             bytes: The audio content as bytes, or None if an error occurs.
         """
+        cached_audio = cached_speech(self.audio_cache, text, voice)
+        if cached_audio:
+            return cached_audio
+
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=text
-            )
-            
+            with self.metrics.track("speech", TTS_MODEL) as call:
+                response = self.scheduler.call("speech", lambda timeout: self.client.audio.speech.create(
+                    model=TTS_MODEL,
+                    voice=voice,
+                    input=text,
+                    timeout=timeout
+                ), on_retry=call.retried)
+                call.audio_bytes = len(response.content)
+
+            store_speech(self.audio_cache, text, voice, response.content)
             return response.content
         except Exception as e:
             error_message = f"{Fore.RED}An error occurred during text-to-speech conversion: {e}{Style.RESET_ALL}"
             print(error_message)
             return None
+
+    def stream_text_to_speech(self, text: str, voice: str = "nova", chunk_size: int = 4096):
+        """
+        Convert text to speech and yield the audio while it is being downloaded.
+
+        The audio is raw PCM (24 kHz, 16-bit signed little-endian, mono), which can
+        be played before the whole clip has arrived.
+
+        Args:
+            text (str): The text to convert to speech.
+            voice (str, optional): The voice to use for text-to-speech. Defaults to "nova".
+            chunk_size (int, optional): The size of the yielded chunks in bytes. Defaults to 4096.
+
+        Yields:
+            bytes: The next chunk of PCM audio.
+
+        Raises:
+            OpenAIError: If the request fails.
+        """
+        cached_audio = cached_speech(self.audio_cache, text, voice, "pcm")
+        if cached_audio:
+            for start in range(0, len(cached_audio), chunk_size):
+                yield cached_audio[start:start + chunk_size]
+            return
+
+        received = bytearray()
+        with self.metrics.track("speech", TTS_MODEL) as call:
+            with self.scheduler.open_stream("speech", lambda timeout: self.client.audio.speech.with_streaming_response.create(
+                model=TTS_MODEL,
+                voice=voice,
+                input=text,
+                response_format="pcm",
+                timeout=timeout
+            ), on_retry=call.retried) as response:
+                for chunk in response.iter_bytes(chunk_size):
+                    call.first_byte()
+                    received.extend(chunk)
+                    call.audio_bytes = len(received)
+                    yield chunk
+
+        store_speech(self.audio_cache, text, voice, bytes(received), "pcm")
@@ -0,0 +1,157 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+"""
+    Notes:
+    The startup profiler records a tree of timed sections. Sections are opened
+    with profile_section(), which does nothing unless a profiler is active, so
+    the calls can stay in the code permanently. While active, an import hook
+    records how long each module takes to execute as "import" sections.
+    """
+
+_active_profiler = None
+
+
+class _TimedLoader:
+    """
+    Wraps a module loader so that executing the module is recorded as a section.
+    """
+
+    def __init__(self, loader, fullname: str, profiler: "StartupProfiler"):
+        self.__loader = loader
+        self.__fullname = fullname
+        self.__profiler = profiler
+
+    def create_module(self, spec):
+        return self.__loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hand the module back its real loader so nothing downstream sees the wrapper
+        module.__loader__ = self.__loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self.__loader
+        with self.__profiler.section(self.__fullname, kind="import"):
+            self.__loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self.__loader, name)
+
+
+class _ImportTimer(MetaPathFinder):
+    """
+    Meta path finder that delegates to the other finders and times the loaders they return.
+    """
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, fullname, self.profiler)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """
+    Records nested timed sections and module import times during startup.
+
+    Attributes:
+        root (dict): The root of the section tree. Each node has a name, a kind,
+            a duration in milliseconds and a list of children.
+    """
+
+    def __init__(self):
+        self.root: dict = {"name": "startup", "kind": "total", "duration_ms": 0.0, "children": []}
+        self.__stack: list = [self.root]
+        self.__import_timer = _ImportTimer(self)
+        self.__started_at: float = None
+        self.__thread = threading.current_thread()
+
+    def start(self) -> None:
+        """Activate the profiler and start timing imports."""
+        global _active_profiler
+        _active_profiler = self
+        self.__started_at = time.perf_counter()
+        sys.meta_path.insert(0, self.__import_timer)
+
+    def stop(self) -> None:
+        """Deactivate the profiler and stop timing imports."""
+        global _active_profiler
+        if self.__import_timer in sys.meta_path:
+            sys.meta_path.remove(self.__import_timer)
+        if self.__started_at is not None:
+            self.root["duration_ms"] = (time.perf_counter() - self.__started_at) * 1000
+        _active_profiler = None
+
+    @contextmanager
+    def section(self, name: str, kind: str = "section"):
+        """
+        Time the enclosed block as a child of the current section.
+
+        Sections opened from threads other than the one that created the
+        profiler are not recorded.
+        """
+        if threading.current_thread() is not self.__thread:
+            yield
+            return
+
+        node = {"name": name, "kind": kind, "duration_ms": 0.0, "children": []}
+        self.__stack[-1]["children"].append(node)
+        self.__stack.append(node)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            node["duration_ms"] = (time.perf_counter() - started_at) * 1000
+            self.__stack.pop()
+
+    def print_report(self, min_duration_ms: float = 1.0) -> None:
+        """
+        Print the section tree, hiding sections shorter than min_duration_ms.
+        """
+        print(f"Startup profile: {self.root['duration_ms']:.1f} ms total")
+        self.__print_node(self.root, 1, min_duration_ms)
+
+    def __print_node(self, node: dict, depth: int, min_duration_ms: float) -> None:
+        hidden = 0
+        for child in node["children"]:
+            if child["duration_ms"] < min_duration_ms:
+                hidden += 1
+                continue
+            print(f"{'  ' * depth}{child['duration_ms']:8.1f} ms  [{child['kind']}] {child['name']}")
+            self.__print_node(child, depth + 1, min_duration_ms)
+        if hidden:
+            print(f"{'  ' * depth}{'':8}     ({hidden} sections under {min_duration_ms} ms)")
+
+    def save_json(self, filename: str) -> None:
+        """
+        Write the full section tree to a JSON file.
+        """
+        with open(filename, 'w') as file:
+            json.dump(self.root, file, indent=4)
+
+
+@contextmanager
+def profile_section(name: str, kind: str = "section"):
+    """
+    Time the enclosed block if a startup profiler is active.
+
+    Args:
+        name (str): The section name shown in the report.
+        kind (str, optional): The section category. Defaults to "section".
+    """
+    if _active_profiler is None:
+        yield
+    else:
+        with _active_profiler.section(name, kind):
+            yield
@@ -5,16 +5,17 @@ import tempfile
 import os
 
 class ReportGenerator:
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, openai_client: OpenAIClient = None):
         self.user_id = user_id
-        self.openai_client = OpenAIClient()
+        self.openai_client = openai_client or OpenAIClient()
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
     def generate_report(self, prompt: str, output_file: str = "report.pdf"):
         temp_html_path = None
         try:
-            # Generate markdown report using OpenAI
-            markdown_report = self.openai_client.get_report(prompt)
+            # Generate markdown report using OpenAI, showing it as it is written
+            markdown_report = self.openai_client.get_report(prompt, lambda delta: print(delta.text, end="", flush=True))
+            print()
 
             # Convert markdown to HTML
             markdowner = Markdown()
@@ -0,0 +1,376 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from openai import OpenAIError, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+from .config import get_setting
+
+"""
+    Notes:
+    Every OpenAI request goes through the RequestScheduler, which applies per
+    endpoint ("chat", "transcription", "speech"):
+    - a concurrency limit (requests in flight),
+    - a token bucket limiting the request rate,
+    - retries of rate-limit (429), timeout, connection and 5xx errors with
+      jittered exponential backoff, honouring the Retry-After header,
+    - a deadline for the whole call, including waiting and retries.
+    The SDK's own retries are disabled (see client_registry) so that retries are
+    not applied twice. For streamed responses (stream=True, or open_stream for
+    the SDK's streaming-response context managers) the request slot is held
+    until the stream has been read to the end or closed, so the
+    concurrency limit also covers the body; retries only cover the request up
+    to the first byte, errors in the middle of a stream are not retried.
+    Synchronous calls are limited by a threading semaphore per endpoint, and
+    asynchronous calls by an asyncio semaphore per endpoint and event loop.
+    """
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+class RequestFailedError(OpenAIError):
+    """
+    Raised when a request could not be completed within its retries or deadline.
+    """
+
+
+@dataclass
+class EndpointPolicy:
+    """
+    Scheduling limits for one endpoint.
+
+    Attributes:
+        max_concurrency (int): The maximum number of requests in flight.
+        requests_per_minute (float): The sustained request rate.
+        burst (int): The number of requests that may be sent at once before rate limiting applies.
+        deadline_seconds (float): The default time budget of a call, including retries.
+        max_retries (int): The maximum number of retries of a call.
+    """
+    max_concurrency: int = 4
+    requests_per_minute: float = 60
+    burst: int = 10
+    deadline_seconds: float = 60
+    max_retries: int = 4
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Callers reserve a token and wait until it is available.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate_per_second: float = rate_per_second
+        self.capacity: int = capacity
+        self.__tokens: float = capacity
+        self.__updated_at: float = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        Returns:
+            float: How many seconds the caller must wait before using the token.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated_at) * self.rate_per_second)
+            self.__updated_at = now
+            self.__tokens -= 1
+            return 0.0 if self.__tokens >= 0 else -self.__tokens / self.rate_per_second
+
+    def refund(self) -> None:
+        """Give back a reserved token that will not be used."""
+        with self.__lock:
+            self.__tokens = min(self.capacity, self.__tokens + 1)
+
+
+class _SlotStream:
+    """
+    Wraps a streamed response and holds its endpoint's request slot until the
+    stream is exhausted or closed.
+    """
+
+    def __init__(self, stream, release):
+        self.__stream = stream
+        self.__iterator = iter(stream)
+        self.__release = release
+        self.__lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.__iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Close the response and free the request slot; safe to call more than once."""
+        with self.__lock:
+            release, self.__release = self.__release, None
+        if release is None:
+            return
+        try:
+            if hasattr(self.__stream, "close"):
+                self.__stream.close()
+        finally:
+            release()
+
+    def __del__(self):
+        # A stream abandoned without being closed must not keep its slot forever
+        self.close()
+
+
+class _AsyncSlotStream:
+    """
+    Asynchronous version of _SlotStream.
+    """
+
+    def __init__(self, stream, release):
+        self.__stream = stream
+        self.__iterator = stream.__aiter__()
+        self.__release = release
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.__iterator.__anext__()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        """Close the response and free the request slot; safe to call more than once."""
+        release, self.__release = self.__release, None
+        if release is None:
+            return
+        try:
+            if hasattr(self.__stream, "close"):
+                await self.__stream.close()
+        finally:
+            release()
+
+
+def _retry_after(error: Exception):
+    """
+    Return the delay requested by the server through Retry-After headers, if any.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class RequestScheduler:
+    """
+    Applies concurrency limits, rate limits, retries and deadlines to API calls.
+    """
+
+    BASE_DELAY_SECONDS = 0.5
+    MAX_DELAY_SECONDS = 20.0
+
+    def __init__(self, policies: dict):
+        """
+        Args:
+            policies (dict[str, EndpointPolicy]): The policy of each endpoint.
+        """
+        self.policies: dict = policies
+        self.__semaphores = {name: threading.BoundedSemaphore(policy.max_concurrency) for name, policy in policies.items()}
+        self.__buckets = {name: TokenBucket(policy.requests_per_minute / 60, policy.burst) for name, policy in policies.items()}
+        # asyncio semaphores belong to one event loop, so there is a set per loop
+        self.__async_semaphores = weakref.WeakKeyDictionary()
+        self.__async_semaphores_lock = threading.Lock()
+
+    def __delay(self, attempt: int, error: Exception) -> float:
+        """Return the wait before the next attempt: Retry-After, else full-jitter exponential backoff."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.MAX_DELAY_SECONDS, self.BASE_DELAY_SECONDS * 2 ** attempt))
+
+    def __async_semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        """Return the endpoint's semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self.__async_semaphores_lock:
+            semaphores = self.__async_semaphores.setdefault(loop, {})
+            if endpoint not in semaphores:
+                semaphores[endpoint] = asyncio.Semaphore(self.policies[endpoint].max_concurrency)
+            return semaphores[endpoint]
+
+    def call(self, endpoint: str, request, deadline_seconds: float = None, on_retry=None, stream: bool = False):
+        """
+        Run a request under the endpoint's limits, retrying transient failures.
+
+        Args:
+            endpoint (str): The endpoint name, e.g. "chat".
+            request (callable): Performs the request; receives the remaining time in
+                seconds, to be used as the request timeout.
+            deadline_seconds (float, optional): The time budget of the call. Defaults to the endpoint's.
+            on_retry (callable, optional): Called with the error and the delay before each retry.
+            stream (bool, optional): Whether request returns a streamed response. The request slot is
+                then held until the returned stream is exhausted or closed. Defaults to False.
+
+        Returns:
+            The result of request; with stream, an iterator over it that must be closed
+            if it is not read to the end.
+
+        Raises:
+            RequestFailedError: If the retries or the deadline are exhausted.
+            OpenAIError: For errors that are not worth retrying.
+        """
+        if not stream:
+            return self.__run(endpoint, request, deadline_seconds, on_retry, hold_slot=False)
+        release = self.__semaphores[endpoint].release
+        result = self.__run(endpoint, request, deadline_seconds, on_retry, hold_slot=True)
+        try:
+            return _SlotStream(result, release)
+        except BaseException:
+            release()
+            raise
+
+    @contextmanager
+    def open_stream(self, endpoint: str, request, deadline_seconds: float = None, on_retry=None):
+        """
+        Open a streamed response under the endpoint's limits, for the SDK's streaming-response API.
+
+        request receives the remaining time and returns the context manager of a streamed
+        response, e.g. client.audio.speech.with_streaming_response.create(...). Entering it
+        sends the request and is retried like call; when the with block exits the response
+        is closed and then the request slot is freed.
+
+        Yields:
+            The entered response.
+
+        Raises:
+            RequestFailedError: If the retries or the deadline are exhausted.
+            OpenAIError: For errors that are not worth retrying.
+        """
+        release = self.__semaphores[endpoint].release
+        with ExitStack() as responses:
+            response = self.__run(endpoint, lambda timeout: responses.enter_context(request(timeout)),
+                                  deadline_seconds, on_retry, hold_slot=True)
+            try:
+                yield response
+            finally:
+                responses.close()
+                release()
+
+    def __run(self, endpoint: str, request, deadline_seconds: float, on_retry, hold_slot: bool):
+        """
+        Run request with retries; with hold_slot, the request slot stays taken after a successful attempt.
+        """
+        policy = self.policies[endpoint]
+        semaphore = self.__semaphores[endpoint]
+        deadline = time.monotonic() + (deadline_seconds or policy.deadline_seconds)
+        attempt = 0
+        while True:
+            if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise RequestFailedError(f"Timed out waiting for a free {endpoint} request slot.")
+            handed_over = False
+            try:
+                wait = self.__buckets[endpoint].reserve()
+                if time.monotonic() + wait >= deadline:
+                    self.__buckets[endpoint].refund()
+                    raise RequestFailedError(f"The {endpoint} rate limit does not allow a request before the deadline.")
+                time.sleep(wait)
+                result = request(deadline - time.monotonic())
+                handed_over = hold_slot
+                return result
+            except RETRYABLE_ERRORS as e:
+                delay = self.__delay(attempt, e)
+                if attempt >= policy.max_retries or time.monotonic() + delay >= deadline:
+                    raise RequestFailedError(f"The {endpoint} request failed after {attempt + 1} attempts: {e}") from e
+                if on_retry:
+                    on_retry(e, delay)
+            finally:
+                if not handed_over:
+                    semaphore.release()
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, endpoint: str, request, deadline_seconds: float = None, on_retry=None, stream: bool = False):
+        """
+        Asynchronous version of call; request is an async callable.
+
+        With stream, the returned async iterator holds the request slot until it is
+        exhausted or closed (await stream.close()).
+        """
+        policy = self.policies[endpoint]
+        semaphore = self.__async_semaphore(endpoint)
+        deadline = time.monotonic() + (deadline_seconds or policy.deadline_seconds)
+        attempt = 0
+        while True:
+            try:
+                await asyncio.wait_for(semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise RequestFailedError(f"Timed out waiting for a free {endpoint} request slot.") from None
+            handed_over = False
+            try:
+                wait = self.__buckets[endpoint].reserve()
+                if time.monotonic() + wait >= deadline:
+                    self.__buckets[endpoint].refund()
+                    raise RequestFailedError(f"The {endpoint} rate limit does not allow a request before the deadline.")
+                await asyncio.sleep(wait)
+                result = await request(deadline - time.monotonic())
+                if stream:
+                    result, handed_over = _AsyncSlotStream(result, semaphore.release), True
+                return result
+            except RETRYABLE_ERRORS as e:
+                delay = self.__delay(attempt, e)
+                if attempt >= policy.max_retries or time.monotonic() + delay >= deadline:
+                    raise RequestFailedError(f"The {endpoint} request failed after {attempt + 1} attempts: {e}") from e
+                if on_retry:
+                    on_retry(e, delay)
+            finally:
+                if not handed_over:
+                    semaphore.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Return the process-wide scheduler, configured from the environment.
+
+    Each endpoint reads ENGLISH_PRACTICE_<ENDPOINT>_CONCURRENCY, _RPM and
+    _DEADLINE_SECONDS (e.g. ENGLISH_PRACTICE_CHAT_RPM); ENGLISH_PRACTICE_MAX_RETRIES
+    applies to all of them.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            defaults = {
+                "chat": EndpointPolicy(max_concurrency=4, requests_per_minute=60, deadline_seconds=60),
+                "transcription": EndpointPolicy(max_concurrency=2, requests_per_minute=50, deadline_seconds=60),
+                "speech": EndpointPolicy(max_concurrency=4, requests_per_minute=50, deadline_seconds=30),
+            }
+            max_retries = get_setting("ENGLISH_PRACTICE_MAX_RETRIES", 4, int)
+            policies = {}
+            for name, default in defaults.items():
+                prefix = f"ENGLISH_PRACTICE_{name.upper()}"
+                policies[name] = EndpointPolicy(
+                    max_concurrency=get_setting(f"{prefix}_CONCURRENCY", default.max_concurrency, int),
+                    requests_per_minute=get_setting(f"{prefix}_RPM", default.requests_per_minute, float),
+                    burst=default.burst,
+                    deadline_seconds=get_setting(f"{prefix}_DEADLINE_SECONDS", default.deadline_seconds, float),
+                    max_retries=max_retries
+                )
+            _scheduler = RequestScheduler(policies)
+        return _scheduler
@@ -0,0 +1,87 @@
+import asyncio
+import re
+from colorama import Fore
+
+"""
+    Notes:
+    While the user is still speaking, AudioRecorder hands over segments of the
+    recording cut at pauses. Each segment is transcribed on AsyncOpenAIClient's
+    background loop as soon as it arrives, so when the user stops only the last
+    (short) segment is still being transcribed. Consecutive segments overlap by
+    a fraction of a second so that no word is lost at a cut; the words repeated
+    at the start of a transcript are dropped when the transcripts are stitched.
+    """
+
+# The fewest and most words two consecutive transcripts are taken to share; a single
+# matching word is more likely a real repetition ("... today. Today I ...") than overlap
+MIN_OVERLAP_WORDS = 2
+MAX_OVERLAP_WORDS = 8
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_transcripts(transcripts: list[str]) -> str:
+    """
+    Join the transcripts of overlapping segments.
+
+    The longest run of words (MIN_OVERLAP_WORDS to MAX_OVERLAP_WORDS) that ends one transcript and
+    starts the next, ignoring case and punctuation, is kept only once.
+
+    Args:
+        transcripts (list[str]): The transcripts in recording order.
+
+    Returns:
+        str: The transcript of the whole recording.
+    """
+    words: list[str] = []
+    for transcript in transcripts:
+        new_words = transcript.split()
+        overlap = 0
+        for size in range(min(MAX_OVERLAP_WORDS, len(words), len(new_words)), MIN_OVERLAP_WORDS - 1, -1):
+            if [_normalize(word) for word in words[-size:]] == [_normalize(word) for word in new_words[:size]]:
+                overlap = size
+                break
+        words.extend(new_words[overlap:])
+    return " ".join(words)
+
+
+class SegmentedTranscriber:
+    """
+    Transcribes the segments of one recording in the background and stitches the results.
+
+    Attributes:
+        async_client (AsyncOpenAIClient): Sends the transcription requests.
+        prepare (callable): Turns a segment into the audio to upload (e.g. resampling it), or None.
+    """
+
+    def __init__(self, async_client, prepare=None):
+        self.async_client = async_client
+        self.prepare = prepare
+        self.__pending: list = []
+
+    def add_segment(self, segment) -> None:
+        """
+        Start transcribing a segment; returns immediately. Usable as AudioRecorder's on_segment callback.
+        """
+        self.__pending.append(self.async_client.submit(self.__transcribe(segment)))
+
+    async def __transcribe(self, segment) -> str:
+        if self.prepare:
+            segment = await asyncio.to_thread(self.prepare, segment)
+        return await self.async_client.transcribe_audio(segment)
+
+    def finish(self) -> str:
+        """
+        Wait for the remaining segments.
+
+        Returns:
+            str: The stitched transcript, or None if no segment was added or one of them
+            could not be transcribed (the error has been printed).
+        """
+        pending, self.__pending = self.__pending, []
+        transcripts = [future.result() for future in pending]
+        if not transcripts or any(transcript.startswith(Fore.RED) for transcript in transcripts):
+            return None
+        return stitch_transcripts(transcripts)
@@ -2,48 +2,37 @@ import os
 import sys
 import signal
 import atexit
+import threading
 from colorama import Fore, Style
 from simple_term_menu import TerminalMenu
 
-from .openai_client import OpenAIClient
-from .feedback_manager import FeedbackManager
-from .audio_recorder import AudioRecorder
-from .audio_player import AudioPlayer
-from .external_assets import ExternalAssets
-from .vocabulary_builder import VocabularyBuilder
-from .dictionary_search import DictionarySearch
 from .authentication import GoogleAuthenticator
-from .achievements import Achievements
-from .report_generator import ReportGenerator
+from .config import get_setting
+from .profiling import profile_section
 
+"""
+    Notes:
+    Components are created on first use of the menu item that needs them, and
+    their modules are only imported at that point. This keeps heavy dependencies
+    (openai, pygame, pyaudio, markdown2, weasyprint) out of the startup path.
+    """
 class EnglishPracticeSimulator:
     """
     Main entry point for the English practice simulator.
     """
-    def __init__(self):
-        self.openai_client = None
-        self.feedback_manager = None
-        self.audio_recorder = None
-        self.audio_player = None
-        self.external_assets = None
-        self.vocabulary_builder = None
-        self.dictionary_search = None
+    def __init__(self, components: dict = None, authenticator=None):
+        """
+        Args:
+            components (dict, optional): Ready-made components keyed by property name
+                (e.g. {"audio_player": ...}), used instead of creating them.
+            authenticator (optional): Used instead of a GoogleAuthenticator; its logout()
+                is called on exit and on Ctrl+C.
+        """
         self.google_authenticator = None
-        self.achievements = None
-        self.report_generator = None
+        self.__components: dict = dict(components or {})
 
         try:
-            # Initialize all components
-            self.openai_client = OpenAIClient()
-            self.feedback_manager = FeedbackManager()
-            self.audio_recorder = AudioRecorder()
-            self.audio_player = AudioPlayer()
-            self.external_assets = ExternalAssets("English Grammar Cheatsheet", "https://sprachinstitut-berlin.de/wp-content/uploads/2019/12/EnglischGrammatikSprachinstitutCheatsheetA3.pdf")
-            self.vocabulary_builder = VocabularyBuilder()
-            self.dictionary_search = DictionarySearch()
-            self.google_authenticator = GoogleAuthenticator()
-            self.achievements = Achievements()
-            self.report_generator = ReportGenerator(self.google_authenticator.get_stored_user_id())
+            self.google_authenticator = authenticator or GoogleAuthenticator()
             
             # Register cleanup functions
             atexit.register(self.__cleanup)
@@ -53,6 +42,126 @@ class EnglishPracticeSimulator:
             # Instead of raising, we'll just print the error and continue
             # This allows the object to be created, even if some components failed to initialize
 
+    def __component(self, name: str, factory):
+        """
+        Return a component, creating it on first access.
+
+        A component that fails to initialize is reported and None is returned;
+        creation is attempted again on the next access.
+
+        Args:
+            name (str): The component name.
+            factory (callable): Creates the component.
+        """
+        if name not in self.__components:
+            try:
+                with profile_section(name, kind="component"):
+                    self.__components[name] = factory()
+            except Exception as e:
+                print(f"Error initializing {name}: {str(e)}")
+                return None
+        return self.__components[name]
+
+    @property
+    def openai_client(self):
+        def create():
+            from .openai_client import OpenAIClient
+            return OpenAIClient()
+        return self.__component("openai_client", create)
+
+    @property
+    def async_openai_client(self):
+        def create():
+            from .async_openai_client import AsyncOpenAIClient
+            return AsyncOpenAIClient(get_setting("ENGLISH_PRACTICE_MAX_CONCURRENT_REQUESTS", 4, int))
+        return self.__component("async_openai_client", create)
+
+    @property
+    def feedback_manager(self):
+        def create():
+            from .feedback_manager import FeedbackManager
+            return FeedbackManager()
+        return self.__component("feedback_manager", create)
+
+    @property
+    def audio_recorder(self):
+        def create():
+            from .audio_recorder import AudioRecorder
+            return AudioRecorder(
+                get_setting("ENGLISH_PRACTICE_VAD", True, bool),
+                get_setting("ENGLISH_PRACTICE_VAD_SILENCE_SECONDS", 1.2, float),
+                get_setting("ENGLISH_PRACTICE_MAX_RECORDING_SECONDS", 300.0, float)
+            )
+        return self.__component("audio_recorder", create)
+
+    @property
+    def audio_player(self):
+        def create():
+            from .audio_player import AudioPlayer
+            return AudioPlayer()
+        return self.__component("audio_player", create)
+
+    @property
+    def external_assets(self):
+        def create():
+            from .external_assets import ExternalAssets
+            return ExternalAssets("English Grammar Cheatsheet", "https://sprachinstitut-berlin.de/wp-content/uploads/2019/12/EnglischGrammatikSprachinstitutCheatsheetA3.pdf")
+        return self.__component("external_assets", create)
+
+    @property
+    def vocabulary_builder(self):
+        def create():
+            from .vocabulary_builder import VocabularyBuilder
+            return VocabularyBuilder()
+        return self.__component("vocabulary_builder", create)
+
+    @property
+    def dictionary_search(self):
+        def create():
+            from .dictionary_search import DictionarySearch
+            return DictionarySearch()
+        return self.__component("dictionary_search", create)
+
+    @property
+    def achievements(self):
+        def create():
+            from .achievements import Achievements
+            return Achievements()
+        return self.__component("achievements", create)
+
+    @property
+    def report_generator(self):
+        def create():
+            from .report_generator import ReportGenerator
+            return ReportGenerator(self.google_authenticator.get_stored_user_id(), self.openai_client)
+        return self.__component("report_generator", create)
+
+    @property
+    def speech_pipeline(self):
+        def create():
+            from .speech_pipeline import SpeechPipeline
+            return SpeechPipeline(
+                self.openai_client,
+                self.audio_player,
+                get_setting("ENGLISH_PRACTICE_TTS_PARALLELISM", 3, int),
+                progressive=get_setting("ENGLISH_PRACTICE_PROGRESSIVE_PLAYBACK", True, bool)
+            )
+        return self.__component("speech_pipeline", create)
+
+    @property
+    def batch_translator(self):
+        def create():
+            from .batch_translator import BatchTranslator
+            return BatchTranslator(self.async_openai_client, self.openai_client.translation_cache)
+        return self.__component("batch_translator", create)
+
+    def initialize_components(self):
+        """Create every component up front (used to measure start-up cost)."""
+        for name in ("openai_client", "async_openai_client", "feedback_manager", "audio_recorder", "audio_player", "external_assets",
+                     "vocabulary_builder", "dictionary_search", "achievements", "report_generator", "speech_pipeline",
+                     "batch_translator"):
+            getattr(self, name)
+
     def __cleanup(self):
         """Remove user_id.json and token.json files."""
         try:
@@ -68,8 +177,6 @@ class EnglishPracticeSimulator:
 
     def run(self):
         """Main loop for the English practice simulator."""
-        history = []
-        
         menu_options = [
             "🎙️ Start English Practice",
             "🔍 Search for a specific word",
@@ -79,6 +186,7 @@ class EnglishPracticeSimulator:
             "💬 Display AI Feedbacks",
             "📊 Display Vocabulary Quiz Results",
             "🏆 Display Achievements",
+            "📈 Display API Metrics",
             "📄 Export Report",
             "🚪 Exit"
         ]
@@ -98,11 +206,13 @@ class EnglishPracticeSimulator:
                 )
                 choice = terminal_menu.show()
                 
-                if choice == 9: 
+                if choice == 10: 
                     self.google_authenticator.logout()
                     break
-                elif choice == 8: 
+                elif choice == 9: 
                     self.__export_report()
+                elif choice == 8:
+                    self.__display_api_metrics()
                 elif choice == 7: 
                     self.achievements.display_all_achievements()
                 elif choice == 6:  
@@ -114,13 +224,15 @@ class EnglishPracticeSimulator:
                 elif choice == 3:  # English Grammar Cheatsheet
                     self.external_assets.open_in_browser()
                 elif choice == 2:  # Translation
-                    text = input(f"{Fore.YELLOW}Enter the text to translate: {Style.RESET_ALL}")
-                    translated_text = self.openai_client.get_translation(text)
-                    print(f"{Fore.GREEN}Translation: {translated_text}{Style.RESET_ALL}")
+                    text = input(f"{Fore.YELLOW}Enter the text to translate (or the path of a .txt/.csv file): {Style.RESET_ALL}")
+                    if os.path.isfile(text.strip()):
+                        self.__translate_file(text.strip())
+                    else:
+                        self.__print_streamed(f"{Fore.GREEN}Translation: ", lambda on_delta: self.openai_client.get_translation(text, on_delta))
                 elif choice == 1:  # Search for a specific word
                     self.dictionary_search.search_dictionary()
                 elif choice == 0:  # Start English Practice
-                    self.__start_practice_session(history)
+                    self.start_practice_session()
 
                 input(f"{Fore.YELLOW}Press Enter to continue...{Style.RESET_ALL}")
             except Exception as e:
@@ -129,7 +241,7 @@ class EnglishPracticeSimulator:
                     self.__cleanup()
                     break
 
-    def __start_practice_session(self, history):
+    def start_practice_session(self):
         """Start an English practice session with Lana."""
         try:
             if self.openai_client is None:
@@ -160,28 +272,105 @@ class EnglishPracticeSimulator:
             """
             
             # Start the practice session with Lana asking the first question
-            response = self.openai_client.get_response(prompt, history)
-            self.__display_and_play_response(response)
-            history.append({"role": "assistant", "content": response})
+            history = self.__new_history()
+            response = self.__respond(prompt, history.messages())
+            if response is None:
+                return
+            history.add("assistant", response)
             
             for exchange_count in range(1, 7):
                 user_input = self.__get_user_input(use_audio)
-                history.append({"role": "user", "content": user_input})
+                history.add("user", user_input)
                 
-                response = self.openai_client.get_response(
+                response = self.__respond(
                     f"Continue the English practice session based on the user's response. Ask follow-up questions or introduce new topics to keep the conversation engaging and fun. There are {7 - exchange_count} exchanges left, including this one. If this is the last exchange, make sure to say goodbye to the user.",
-                    history
+                    history.messages()
                 )
-                self.__display_and_play_response(response)
-                history.append({"role": "assistant", "content": response})
+                if response is None:
+                    print(f"{Fore.RED}Lana is not available right now, so the session ends here. Please try again later.{Style.RESET_ALL}")
+                    return
+                history.add("assistant", response)
                 
                 print(f"{Fore.YELLOW}Exchange {exchange_count + 1}/7{Style.RESET_ALL}")
             
-            self.__provide_feedback(history)
+            self.__provide_feedback(history.feedback_messages())
             
         except Exception as e:
             print(f"An error occurred during the practice session: {str(e)}")
 
+    def __new_history(self):
+        """
+        Create the conversation history of a practice session.
+
+        The token budget comes from ENGLISH_PRACTICE_HISTORY_MAX_TOKENS. Turns beyond
+        the budget are dropped, or summarized if ENGLISH_PRACTICE_HISTORY_SUMMARIZE is set.
+        """
+        from .conversation_history import ConversationHistory
+
+        summarize = None
+        if get_setting("ENGLISH_PRACTICE_HISTORY_SUMMARIZE", False, bool):
+            def summarize(summary, removed_turns):
+                # stream_response raises on failure, so an error never becomes the summary
+                return "".join(self.openai_client.stream_response(
+                    f"Summarize this part of an English practice conversation in a few sentences. "
+                    f"Keep the topics discussed and any mistakes the user made. Only reply with the summary.\n\n"
+                    f"Earlier summary: {summary or 'none'}\n\nConversation:\n{removed_turns}"
+                ))
+
+        return ConversationHistory(
+            get_setting("ENGLISH_PRACTICE_HISTORY_MAX_TOKENS", 3000, int),
+            get_setting("ENGLISH_PRACTICE_HISTORY_KEEP_TURNS", 6, int),
+            summarize
+        )
+
+    def __respond(self, prompt, history):
+        """
+        Get Lana's reply to the prompt, display it and play it as audio.
+
+        With streaming speech enabled (the default), the reply is printed while it
+        streams and spoken sentence by sentence; otherwise it is played once complete.
+
+        Returns:
+            str: The reply, or None if it could not be generated. Errors are printed,
+            never spoken or added to the conversation.
+        """
+        try:
+            if get_setting("ENGLISH_PRACTICE_STREAMING_SPEECH", True, bool):
+                return self.speech_pipeline.speak_stream(self.openai_client.stream_response(prompt, history))
+
+            response = "".join(self.openai_client.stream_response(prompt, history))
+        except Exception as e:
+            print(f"{Fore.RED}An error occurred: {e}{Style.RESET_ALL}")
+            return None
+
+        self.__display_and_play_response(response)
+        return response
+
+    def __print_streamed(self, header, request):
+        """
+        Print a response while it is streamed.
+
+        Args:
+            header (str): Printed before the response.
+            request (callable): Makes the request; receives the on_delta callback.
+
+        Returns:
+            str: The complete response.
+        """
+        print(header, end="", flush=True)
+        streamed = []
+
+        def on_delta(delta):
+            streamed.append(delta.text)
+            print(delta.text, end="", flush=True)
+
+        response = request(on_delta)
+        if "".join(streamed) != response:
+            # Served from a cache or failed: nothing (or not everything) was streamed
+            print(response if not streamed else f"\n{response}", end="")
+        print(Style.RESET_ALL)
+        return response
+
     def __display_and_play_response(self, response):
         """Display Lana's response and play it as audio."""
         try:
@@ -198,8 +387,18 @@ class EnglishPracticeSimulator:
             if use_audio:
                 print(f"{Fore.YELLOW}Press Enter to start recording your response. Press Enter again to stop.{Style.RESET_ALL}")
                 input()  # Wait for Enter to start recording
-                self.audio_recorder.record_audio()
-                user_input = self.openai_client.transcribe_audio()
+                # Recordings stay in memory unless ENGLISH_PRACTICE_SAVE_RECORDINGS asks for input.wav
+                debug_filename = "input.wav" if get_setting("ENGLISH_PRACTICE_SAVE_RECORDINGS", False, bool) else None
+                if get_setting("ENGLISH_PRACTICE_SEGMENTED_TRANSCRIPTION", False, bool):
+                    user_input = self.__record_and_transcribe_segments(debug_filename)
+                else:
+                    recording = self.audio_recorder.record_to_buffer(debug_filename)
+                    if recording:
+                        recording = self.__prepare_recording(recording)
+                    user_input = self.openai_client.transcribe_audio(recording) if recording else f"{Fore.RED}Nothing was recorded.{Style.RESET_ALL}"
+                if user_input.startswith(Fore.RED):
+                    # The error has been printed; let the user type instead of sending it to Lana
+                    user_input = input(f"{Fore.YELLOW}Type your response: {Style.RESET_ALL}")
             else:
                 user_input = input(f"{Fore.YELLOW}Type your response: {Style.RESET_ALL}")
             
@@ -209,22 +408,162 @@ class EnglishPracticeSimulator:
             print(f"Error getting user input: {str(e)}")
             return ""
 
+    def __record_and_transcribe_segments(self, debug_filename):
+        """
+        Record an answer and transcribe it segment by segment while the user speaks.
+
+        Falls back to transcribing the whole recording if a segment fails.
+
+        Returns:
+            str: The transcript, or an error message starting with Fore.RED.
+        """
+        from .segmented_transcriber import SegmentedTranscriber
+
+        transcriber = SegmentedTranscriber(self.async_openai_client, self.__prepare_recording)
+        recording = self.audio_recorder.record_to_buffer(debug_filename, on_segment=transcriber.add_segment)
+        transcript = transcriber.finish()
+        if transcript is not None:
+            return transcript
+        if not recording:
+            return f"{Fore.RED}Nothing was recorded.{Style.RESET_ALL}"
+        return self.openai_client.transcribe_audio(self.__prepare_recording(recording))
+
+    def __prepare_recording(self, recording):
+        """
+        Resample (ENGLISH_PRACTICE_UPLOAD_SAMPLE_RATE, 16 kHz by default) and optionally
+        compress (ENGLISH_PRACTICE_UPLOAD_FORMAT) a recording before it is uploaded.
+        The recording is returned unchanged if it cannot be processed.
+        """
+        try:
+            from .audio_processing import prepare_for_upload, SPEECH_SAMPLE_RATE
+            return prepare_for_upload(
+                recording,
+                get_setting("ENGLISH_PRACTICE_UPLOAD_SAMPLE_RATE", SPEECH_SAMPLE_RATE, int),
+                get_setting("ENGLISH_PRACTICE_UPLOAD_FORMAT", "wav")
+            )
+        except Exception as e:
+            print(f"{Fore.YELLOW}Uploading the original recording: {e}{Style.RESET_ALL}")
+            recording.seek(0)
+            return recording
+
     def __provide_feedback(self, history):
-        """Generate and display feedback for the practice session."""
+        """
+        Generate, display, speak and save the feedback for the practice session.
+
+        With streaming speech the feedback is spoken sentence by sentence while it
+        is generated. Once the text is complete it is saved on a background thread,
+        so saving overlaps the remaining playback instead of following it.
+        """
+        streaming = get_setting("ENGLISH_PRACTICE_STREAMING_SPEECH", True, bool)
+        savers = []
+
+        def save_in_background(feedback):
+            if streaming:
+                # The spoken text is still on its line until playback finishes
+                print(Style.RESET_ALL)
+            saver = threading.Thread(target=self.feedback_manager.save_feedback, args=(feedback,), name="save-feedback")
+            saver.start()
+            savers.append(saver)
+
         try:
-            feedback = self.openai_client.get_feedback(history)
             print(f"\n{Fore.MAGENTA}Practice Session Feedback:{Style.RESET_ALL}")
-            print(feedback)
-            
-            feedback_audio = self.openai_client.text_to_speech(feedback)
-            if feedback_audio:
-                print(f"{Fore.YELLOW}Playing feedback audio...{Style.RESET_ALL}")
-                self.audio_player.play_audio(feedback_audio)
-            
-            self.feedback_manager.save_feedback(feedback)
-            print(f"{Fore.YELLOW}Feedback has been saved to 'english_practice_feedback.json'{Style.RESET_ALL}")
+            deltas = self.__on_complete(self.__feedback_deltas(history), save_in_background)
+            if streaming:
+                self.speech_pipeline.speak_stream(deltas)
+            else:
+                parts = []
+                for delta in deltas:
+                    print(delta, end="", flush=True)
+                    parts.append(delta)
+                print(Style.RESET_ALL)
+                feedback = "".join(parts)
+                feedback_audio = self.openai_client.text_to_speech(feedback)
+                if feedback_audio:
+                    print(f"{Fore.YELLOW}Playing feedback audio...{Style.RESET_ALL}")
+                    self.audio_player.play_audio(feedback_audio)
         except Exception as e:
             print(f"Error providing feedback: {str(e)}")
+        finally:
+            for saver in savers:
+                saver.join()
+
+    def __feedback_deltas(self, history):
+        """
+        Yield the feedback text piece by piece.
+
+        With ENGLISH_PRACTICE_SECTIONED_FEEDBACK set, the sections in FEEDBACK_SECTIONS
+        are requested in parallel and each one is yielded, in order, as soon as it
+        and the ones before it are ready. Otherwise the feedback is one streamed response.
+
+        Raises:
+            OpenAIError: If the feedback could not be generated.
+        """
+        if not get_setting("ENGLISH_PRACTICE_SECTIONED_FEEDBACK", False, bool):
+            yield from self.openai_client.stream_feedback(history)
+            return
+
+        from openai import OpenAIError
+        from .openai_client import FEEDBACK_SECTIONS
+
+        client = self.async_openai_client
+        sections = [(title, client.submit(client.get_feedback_section(focus, history))) for title, focus in FEEDBACK_SECTIONS]
+        try:
+            for number, (title, section) in enumerate(sections):
+                text = section.result()
+                if text.startswith(Fore.RED):
+                    raise OpenAIError(f"The {title.lower()} feedback could not be generated.")
+                separator = "\n\n" if number else ""
+                yield f"{separator}{title}:\n{text.strip()}"
+        finally:
+            for _, section in sections:
+                section.cancel()
+
+    @staticmethod
+    def __on_complete(deltas, callback):
+        """Pass the deltas through and call callback with the full text once they are exhausted."""
+        parts = []
+        for delta in deltas:
+            parts.append(delta)
+            yield delta
+        callback("".join(parts))
+
+    def __translate_file(self, input_file):
+        """Translate a text or CSV file line by line and write the result next to it."""
+        name, extension = os.path.splitext(input_file)
+        default_output = f"{name}.translated{extension}"
+        output_file = input(f"{Fore.YELLOW}Output file (press Enter for {default_output}): {Style.RESET_ALL}") or default_output
+        column = None
+        if extension.lower() == ".csv":
+            column = input(f"{Fore.YELLOW}Column to translate, by name or number (press Enter for the first column): {Style.RESET_ALL}") or None
+
+        try:
+            stats = self.batch_translator.translate_file(
+                input_file, output_file, column,
+                lambda written: print(f"\r{Fore.CYAN}Translated {written} lines...{Style.RESET_ALL}", end="", flush=True)
+            )
+            print()
+            print(f"{Fore.GREEN}Translation written to {output_file}: {stats['translated']} translated, "
+                  f"{stats['cached']} from cache, {stats['empty']} empty, {stats['failed']} failed.{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}Error translating {input_file}: {e}{Style.RESET_ALL}")
+
+    def __display_api_metrics(self):
+        """Display latency, token and retry statistics of the API calls, and optionally export them."""
+        from .metrics import get_metrics
+
+        metrics = get_metrics()
+        print(f"{Fore.CYAN}API calls made in this run:{Style.RESET_ALL}")
+        metrics.print_report()
+        if not metrics.recent:
+            return
+
+        filename = input(f"{Fore.YELLOW}Enter a file name to export the calls as JSON lines (or press Enter to skip): {Style.RESET_ALL}")
+        if filename:
+            try:
+                count = metrics.export_jsonl(filename)
+                print(f"{Fore.GREEN}Exported {count} calls to {filename}.{Style.RESET_ALL}")
+            except IOError as e:
+                print(f"{Fore.RED}Error exporting API metrics: {e}{Style.RESET_ALL}")
 
     def __export_report(self):
         """Export a report of the user's progress and activities."""
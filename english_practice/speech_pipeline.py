@@ -0,0 +1,156 @@
+import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+
+"""
+    Notes:
+    The speech pipeline overlaps the three slow stages of a reply:
+    - the chat completion is printed delta by delta as it streams in,
+    - every complete sentence is sent to text-to-speech right away, several at a time,
+    - a player thread plays the synthesized clips strictly in sentence order.
+    Lana therefore starts speaking once the first sentence is generated and
+    synthesized, instead of after the whole reply has been processed.
+    With progressive playback, clips are downloaded as raw PCM and each one
+    starts playing as soon as its first fraction of a second has arrived,
+    instead of after its whole MP3 file has been downloaded.
+    """
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])["\')\]]*\s+|\n+')
+
+
+def split_sentences(text: str) -> tuple[list[str], str]:
+    """
+    Split text into complete sentences and the unfinished remainder.
+
+    Args:
+        text (str): The text received so far.
+
+    Returns:
+        tuple[list[str], str]: The complete sentences and the trailing text that
+        does not end with a sentence boundary yet.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    return sentences, text[start:]
+
+
+class SpeechPipeline:
+    """
+    Prints a streamed reply and speaks it sentence by sentence while it is still being generated.
+
+    Attributes:
+        openai_client (OpenAIClient): Used for text-to-speech.
+        audio_player (AudioPlayer): Used to play the synthesized clips.
+        max_parallel_tts (int): The maximum number of concurrent text-to-speech requests.
+        min_chunk_chars (int): Short sentences are merged until a chunk has at least this many characters.
+        progressive (bool): Whether clips are streamed and played while they download.
+    """
+
+    def __init__(self, openai_client, audio_player, max_parallel_tts: int = 3, min_chunk_chars: int = 40, progressive: bool = True):
+        self.openai_client = openai_client
+        self.audio_player = audio_player
+        self.max_parallel_tts: int = max_parallel_tts
+        self.min_chunk_chars: int = min_chunk_chars
+        self.progressive: bool = progressive
+
+    def speak_stream(self, deltas, speaker: str = "Lana") -> str:
+        """
+        Print the streamed text, synthesize it per sentence and play the clips in order.
+
+        Args:
+            deltas (Iterable[str]): The pieces of text as they arrive.
+            speaker (str, optional): The name printed before the text. Defaults to "Lana".
+
+        Returns:
+            str: The complete text.
+
+        Raises:
+            Exception: Any error raised while iterating deltas, after the audio
+            already queued has finished playing.
+        """
+        clips: queue.Queue = queue.Queue()
+        player_thread = threading.Thread(target=self.__play_clips, args=(clips,))
+        player_thread.start()
+
+        parts = []
+        pending = ""
+        chunk = ""
+        print(f"{Fore.GREEN}{speaker}: ", end="", flush=True)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel_tts) as executor:
+                for delta in deltas:
+                    print(delta, end="", flush=True)
+                    parts.append(delta)
+                    sentences, pending = split_sentences(pending + delta)
+                    for sentence in sentences:
+                        chunk = f"{chunk} {sentence}".strip()
+                        if len(chunk) >= self.min_chunk_chars:
+                            clips.put(self.__synthesize(executor, chunk))
+                            chunk = ""
+                # Only reached when the stream completed: a cut-off sentence is not spoken
+                chunk = f"{chunk} {pending}".strip()
+                if chunk:
+                    clips.put(self.__synthesize(executor, chunk))
+        finally:
+            print(Style.RESET_ALL)
+            clips.put(None)
+            player_thread.join()
+
+        return "".join(parts)
+
+    def __synthesize(self, executor: ThreadPoolExecutor, text: str):
+        """
+        Start synthesizing a chunk of text.
+
+        Returns:
+            queue.Queue | Future: With progressive playback, a queue receiving the PCM audio
+            as it downloads (None at the end); otherwise a future of the whole clip.
+        """
+        if not self.progressive:
+            return executor.submit(self.openai_client.text_to_speech, text)
+        audio: queue.Queue = queue.Queue()
+        executor.submit(self.__download, text, audio)
+        return audio
+
+    def __download(self, text: str, audio: queue.Queue) -> None:
+        try:
+            for chunk in self.openai_client.stream_text_to_speech(text):
+                audio.put(chunk)
+        except Exception as e:
+            print(f"{Fore.RED}Error synthesizing response audio: {e}{Style.RESET_ALL}")
+        finally:
+            audio.put(None)
+
+    @staticmethod
+    def __received(audio: queue.Queue):
+        """Yield the chunks of a downloading clip until its end."""
+        while True:
+            chunk = audio.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def __play_clips(self, clips: queue.Queue) -> None:
+        """
+        Play synthesized clips in the order they were queued until None is received.
+        """
+        while True:
+            clip = clips.get()
+            if clip is None:
+                return
+            try:
+                if isinstance(clip, queue.Queue):
+                    self.audio_player.play_stream(self.__received(clip))
+                    continue
+                audio_data = clip.result()
+                if audio_data:
+                    self.audio_player.play_audio(audio_data)
+            except Exception as e:
+                print(f"{Fore.RED}Error playing response audio: {e}{Style.RESET_ALL}")
@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+
+"""
+    Notes:
+    Translations are cached in a small SQLite database keyed by the normalized
+    input text (Unicode NFKC, surrounding and repeated whitespace collapsed).
+    Entries expire after a TTL, and once the cache holds more than max_entries
+    the least recently used entries are evicted. Identical requests that arrive
+    while the first one is still being translated wait for its result instead
+    of calling the API again (single-flight).
+    """
+
+
+class TranslationCache:
+    """
+    A persistent, size-bounded LRU cache for translations.
+
+    Attributes:
+        database (str): Path of the SQLite database file.
+        max_entries (int): The maximum number of cached translations.
+        ttl_seconds (float): How long a cached translation stays valid.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translations (
+            key TEXT PRIMARY KEY,
+            translation TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used);
+    """
+
+    def __init__(self, database: str = "db/translation_cache.db", max_entries: int = 5000, ttl_seconds: float = 30 * 24 * 3600):
+        self.database: str = database
+        self.max_entries: int = max_entries
+        self.ttl_seconds: float = ttl_seconds
+        # Re-entrant: get_or_translate re-checks the cache while holding it
+        self.__lock = threading.RLock()
+        self.__in_flight: dict = {}
+        self.__stats: dict = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        self.__connection = sqlite3.connect(database, check_same_thread=False)
+        with self.__connection:
+            self.__connection.executescript(self.SCHEMA)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize text so that trivially different inputs share a cache entry.
+        """
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    def get(self, text: str):
+        """
+        Return the cached translation of text, or None if it is missing or expired.
+        """
+        key = self.normalize(text)
+        now = time.time()
+        with self.__lock, self.__connection:
+            row = self.__connection.execute(
+                "SELECT translation, created_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self.__connection.execute("DELETE FROM translations WHERE key = ?", (key,))
+                return None
+            self.__connection.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, text: str, translation: str) -> None:
+        """
+        Store a translation and evict the least recently used entries beyond max_entries.
+        """
+        key = self.normalize(text)
+        now = time.time()
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO translations (key, translation, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, translation, now, now)
+            )
+            (count,) = self.__connection.execute("SELECT COUNT(*) FROM translations").fetchone()
+            if count > self.max_entries:
+                self.__connection.execute(
+                    "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                self.__stats["evictions"] += count - self.max_entries
+
+    def get_or_translate(self, text: str, translate, should_cache=None) -> str:
+        """
+        Return the cached translation of text, translating it on a miss.
+
+        Concurrent calls for the same text share a single call to translate.
+
+        Args:
+            text (str): The text to translate.
+            translate (callable): Called without arguments to produce the translation.
+            should_cache (callable, optional): Decides whether a result may be cached
+                (e.g. to skip error messages). Defaults to caching every result.
+
+        Returns:
+            str: The translation.
+        """
+        cached = self.get(text)
+        if cached is not None:
+            self.__stats["hits"] += 1
+            return cached
+
+        key = self.normalize(text)
+        with self.__lock:
+            future = self.__in_flight.get(key)
+            if future is None:
+                # A leader may have stored the translation and finished since the lookup above
+                cached = self.get(text)
+                if cached is not None:
+                    self.__stats["hits"] += 1
+                    return cached
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self.__in_flight[key] = future
+                self.__stats["misses"] += 1
+            else:
+                self.__stats["coalesced"] += 1
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            translation = translate()
+            if should_cache is None or should_cache(translation):
+                self.put(text, translation)
+            future.set_result(translation)
+            return translation
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                del self.__in_flight[key]
+
+    def stats(self) -> dict:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hits, misses, coalesced requests, evictions and the number of entries.
+        """
+        with self.__lock:
+            (entries,) = self.__connection.execute("SELECT COUNT(*) FROM translations").fetchone()
+            return {**self.__stats, "entries": entries}
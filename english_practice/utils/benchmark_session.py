@@ -0,0 +1,356 @@
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import wave
+from .fake_openai_server import start_server, add_config_arguments, config_from_args
+
+"""
+    Notes:
+    Runs complete 7-exchange practice sessions through EnglishPracticeSimulator
+    against the local fake OpenAI server (or any server given with --base-url)
+    and reports how long every stage took:
+    - chat: time to first token and total generation time,
+    - speech / speech stream: text-to-speech time (to the first chunk when streamed),
+    - transcription: speech-to-text time (with --audio-input),
+    - playback: simulated playback time of every clip,
+    - response latency: from the end of the user's turn until Lana starts speaking
+      (greeting and feedback latency likewise, from the start of the session and
+      of the feedback request),
+    - feedback: time to the first and last piece of the feedback text,
+    - wrap-up: from the start of the feedback until it has been spoken and saved,
+    - exchange and session: wall-clock time of each exchange and session.
+    The user's answers are scripted, audio playback is simulated (no sound device
+    is needed) and everything runs in a temporary working directory, so the
+    user's credentials and data are never touched.
+
+    Usage:
+        python -m english_practice.utils.benchmark_session --sessions 3 --latency 0.5 --tokens-per-second 30
+    """
+
+ANSWERS = [
+    "I usually go hiking with my friends on the weekend.",
+    "Last month we climbed a mountain near my city, and the view was amazing.",
+    "I started hiking because my doctor told me to exercise more.",
+    "My favourite food after a long hike is a big plate of rice with chicken.",
+    "Next year I want to travel to Japan and visit Mount Fuji.",
+    "Thank you, I really enjoyed talking with you today.",
+]
+
+
+class StageTimings:
+    """
+    Collects the durations of the benchmarked stages.
+    """
+
+    def __init__(self):
+        self.samples: dict = {}
+        self.__lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self.__lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage: str, function):
+        """Return function, timed as stage."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    def wrap_stream(self, stage: str, function):
+        """Return a generator function, timed to its first item and to its end."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            first = True
+            for item in function(*args, **kwargs):
+                if first:
+                    self.record(f"{stage}: first chunk", time.perf_counter() - start)
+                    first = False
+                yield item
+            self.record(f"{stage}: total", time.perf_counter() - start)
+        return timed
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: For every stage, the number of samples and the mean, p50, p95 and max in milliseconds.
+        """
+        result = {}
+        for stage, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            result[stage] = {
+                "count": len(ordered),
+                "mean_ms": statistics.fmean(ordered) * 1000,
+                "p50_ms": ordered[int(0.50 * (len(ordered) - 1))] * 1000,
+                "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return result
+
+    def print_report(self) -> None:
+        print(f"{'stage':<34}{'count':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for stage, row in self.summary().items():
+            print(f"{stage:<34}{row['count']:>6}{row['mean_ms']:>10.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['max_ms']:>10.1f}")
+
+
+class BenchmarkAudioPlayer:
+    """
+    Stands in for AudioPlayer: consumes the audio and waits as long as playing it would take.
+
+    Attributes:
+        playback_speed (float): How many times faster than real time clips are "played"; 0 skips the wait.
+        on_first_audio (callable): Called before each clip starts playing.
+    """
+
+    # Compressed (mp3) audio is assumed to be 128 kbps
+    COMPRESSED_BYTES_PER_SECOND = 16000
+
+    def __init__(self, timings: StageTimings, playback_speed: float = 1.0, on_first_audio=None):
+        self.timings: StageTimings = timings
+        self.playback_speed: float = playback_speed
+        self.on_first_audio = on_first_audio
+
+    def __play(self, seconds: float) -> None:
+        self.timings.record("playback", seconds)
+        if self.playback_speed:
+            time.sleep(seconds / self.playback_speed)
+
+    def play_audio(self, audio_data):
+        if audio_data:
+            self.on_first_audio()
+            self.__play(len(audio_data) / self.COMPRESSED_BYTES_PER_SECOND)
+
+    def play_stream(self, chunks, sample_rate: int = 24000, prebuffer_seconds: float = 0.25):
+        received = 0
+        for chunk in chunks:
+            if not received:
+                self.on_first_audio()
+            received += len(chunk)
+        self.__play(received / (sample_rate * 2))
+
+
+class BenchmarkAudioRecorder:
+    """
+    Stands in for AudioRecorder: records silence of a fixed length.
+    """
+
+    def __init__(self, seconds: float = 5.0, on_recorded=None):
+        self.seconds: float = seconds
+        self.on_recorded = on_recorded
+
+    def record_audio(self, filename: str = "input.wav") -> None:
+        with open(filename, 'wb') as file:
+            file.write(self.record_to_buffer().getvalue())
+
+    def record_to_buffer(self, debug_filename: str = None, on_segment=None) -> io.BytesIO:
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(44100)
+            wf.writeframes(bytes(int(44100 * self.seconds) * 2))
+        buffer.seek(0)
+        buffer.name = "input.wav"
+        if debug_filename:
+            with open(debug_filename, 'wb') as file:
+                file.write(buffer.getvalue())
+        if on_segment:
+            # Silence has no pauses to cut at: the whole recording is one segment
+            segment = io.BytesIO(buffer.getvalue())
+            segment.name = buffer.name
+            on_segment(segment)
+        self.on_recorded()
+        return buffer
+
+
+class BenchmarkAuthenticator:
+    """
+    Stands in for GoogleAuthenticator. The simulator logs out when the process exits,
+    which would delete the user's real token.json and user_id.json.
+    """
+
+    def get_stored_user_id(self) -> str:
+        return "benchmark-user"
+
+    def logout(self) -> None:
+        pass
+
+
+class SessionBenchmark:
+    """
+    Drives practice sessions with scripted input and records the stage timings.
+    """
+
+    def __init__(self, use_audio: bool = False, playback_speed: float = 1.0, recording_seconds: float = 5.0):
+        self.use_audio: bool = use_audio
+        self.timings: StageTimings = StageTimings()
+        self.audio_player = BenchmarkAudioPlayer(self.timings, playback_speed, self.__audio_started)
+        self.audio_recorder = BenchmarkAudioRecorder(recording_seconds, self.__turn_ended)
+        self.__answers: list = []
+        self.__waiting_since: float = None
+        self.__waiting_stage: str = None
+        self.__exchange_started_at: float = None
+        self.__feedback_started_at: float = None
+
+    def __turn_ended(self, stage: str = "response latency") -> None:
+        """Start the clocks for the wait until Lana speaks and for the exchange."""
+        self.__waiting_since = self.__exchange_started_at = time.perf_counter()
+        self.__waiting_stage = stage
+
+    def __audio_started(self) -> None:
+        if self.__waiting_since is not None:
+            self.timings.record(self.__waiting_stage, time.perf_counter() - self.__waiting_since)
+            self.__waiting_since = None
+
+    def __input(self, prompt: str = "") -> str:
+        """Answer the simulator's prompts like a user would."""
+        if "Enter your name" in prompt:
+            return "Sam"
+        if "Enter your choice" in prompt:
+            return "1" if self.use_audio else "2"
+        # Any other prompt asks for the user's next answer, which ends the exchange
+        if self.__exchange_started_at is not None:
+            self.timings.record("exchange", time.perf_counter() - self.__exchange_started_at)
+            self.__exchange_started_at = None
+        if "Type your response" in prompt:
+            answer = self.__answers.pop(0) if self.__answers else "Yes."
+            self.__turn_ended()
+            return answer
+        return ""
+
+    def instrument(self, simulator) -> None:
+        """Time the OpenAI calls made by the simulator."""
+        client = simulator.openai_client
+        client.stream_response_deltas = self.timings.wrap_stream("chat", client.stream_response_deltas)
+        client.text_to_speech = self.timings.wrap("speech", client.text_to_speech)
+        client.stream_text_to_speech = self.timings.wrap_stream("speech stream", client.stream_text_to_speech)
+        client.transcribe_audio = self.timings.wrap("transcription", client.transcribe_audio)
+        stream_feedback = client.stream_feedback
+
+        def timed_feedback(history):
+            self.__feedback_started()
+            return stream_feedback(history)
+        client.stream_feedback = self.timings.wrap_stream("feedback", timed_feedback)
+
+        # Sectioned feedback is requested through the async client instead
+        async_client = simulator.async_openai_client
+        get_feedback_section = async_client.get_feedback_section
+
+        async def timed_feedback_section(focus, history):
+            self.__feedback_started()
+            return await get_feedback_section(focus, history)
+        async_client.get_feedback_section = timed_feedback_section
+
+    def __feedback_started(self) -> None:
+        """Start the feedback latency and wrap-up clocks (once per session)."""
+        if self.__feedback_started_at is None:
+            self.__feedback_started_at = time.perf_counter()
+            self.__turn_ended("feedback latency")
+
+    def run_session(self, simulator, quiet: bool = True) -> None:
+        """Run one complete practice session."""
+        self.__answers = list(ANSWERS)
+        self.__feedback_started_at = None
+        self.__turn_ended("greeting latency")
+        original_input = builtins.input
+        builtins.input = self.__input
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                simulator.start_practice_session()
+        finally:
+            builtins.input = original_input
+        end = time.perf_counter()
+        self.timings.record("session", end - start)
+        if self.__feedback_started_at is not None:
+            # The feedback is the last step of a session: from its request until it has been spoken and saved
+            self.timings.record("wrap-up", end - self.__feedback_started_at)
+
+
+def prepare_environment(workdir: str, base_url: str) -> None:
+    """
+    Point the application at the fake server and keep all of its files in workdir.
+    """
+    os.chdir(workdir)
+    os.makedirs("db", exist_ok=True)
+    with open(os.path.join("db", "user_id.json"), 'w') as file:
+        json.dump({"user_id": "benchmark-user"}, file)
+
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": base_url,
+        "ENGLISH_PRACTICE_DB_DIR": "db",
+        "ENGLISH_PRACTICE_SQLITE_PATH": os.path.join("db", "english_practice.db"),
+        "ENGLISH_PRACTICE_TRANSLATION_CACHE_PATH": os.path.join("db", "translation_cache.db"),
+        "ENGLISH_PRACTICE_TTS_CACHE_DIR": os.path.join("db", "tts_cache"),
+    })
+    # Synthesized speech would be served from the cache after the first session
+    os.environ.setdefault("ENGLISH_PRACTICE_TTS_CACHE", "false")
+    # Rate limits are for the real API; keep them out of the way unless set explicitly
+    for endpoint in ("CHAT", "TRANSCRIPTION", "SPEECH"):
+        os.environ.setdefault(f"ENGLISH_PRACTICE_{endpoint}_RPM", "100000")
+        os.environ.setdefault(f"ENGLISH_PRACTICE_{endpoint}_CONCURRENCY", "16")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark practice sessions against a local fake OpenAI server.")
+    parser.add_argument("--sessions", type=int, default=1, help="Number of sessions to run.")
+    parser.add_argument("--audio-input", action="store_true", help="Answer with (silent) recordings instead of typed text.")
+    parser.add_argument("--playback-speed", type=float, default=1.0,
+                        help="Simulated playback speed relative to real time; 0 skips playback waits.")
+    parser.add_argument("--base-url", help="Use an already running server instead of starting the fake one.")
+    parser.add_argument("--output", metavar="FILE", help="Also write the timings to FILE as JSON.")
+    parser.add_argument("--verbose", action="store_true", help="Show the simulator's output.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    output_file = os.path.abspath(args.output) if args.output else None
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = start_server(config_from_args(args))
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="english-practice-benchmark-")
+    try:
+        prepare_environment(workdir, base_url)
+        from english_practice.simulator import EnglishPracticeSimulator
+
+        benchmark = SessionBenchmark(args.audio_input, args.playback_speed)
+        simulator = EnglishPracticeSimulator(
+            {"audio_player": benchmark.audio_player, "audio_recorder": benchmark.audio_recorder},
+            BenchmarkAuthenticator()
+        )
+        if simulator.openai_client is None:
+            raise SystemExit("The OpenAI client could not be created; see the error above.")
+        benchmark.instrument(simulator)
+        for session in range(args.sessions):
+            print(f"Running session {session + 1}/{args.sessions}...")
+            benchmark.run_session(simulator, quiet=not args.verbose)
+
+        benchmark.timings.print_report()
+        if output_file:
+            with open(output_file, 'w') as file:
+                json.dump({"config": vars(args), "stages": benchmark.timings.summary(), "samples": benchmark.timings.samples}, file, indent=4)
+            print(f"Timings written to {output_file}")
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
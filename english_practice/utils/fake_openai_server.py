@@ -0,0 +1,260 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+    Notes:
+    A local stand-in for the parts of the OpenAI API used by OpenAIClient:
+    - POST /v1/chat/completions (streamed as server-sent events, or as one JSON response)
+    - POST /v1/audio/transcriptions
+    - POST /v1/audio/speech (streamed with chunked transfer encoding)
+    Chat replies are canned tutor sentences, except that numbered batch prompts
+    (see BatchTranslator) are answered line for line.
+    Latency, token rate, speech synthesis speed and failures are configurable,
+    so the practice loop can be benchmarked offline with repeatable timings.
+    Point the application at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+    Usage:
+        python -m english_practice.utils.fake_openai_server --port 8765 --latency 0.4 --tokens-per-second 40
+    """
+
+REPLY_SENTENCES = [
+    "Oh, that's really cool!",
+    "I've tried something like that before, and honestly it was a lot of fun.",
+    "What made you interested in it in the first place?",
+    "Tell me a bit more about how you usually spend your weekends.",
+    "That sounds like a great way to practice your English, too!",
+    "Do you think you'll keep doing it next year?",
+]
+
+NUMBERED_LINE = re.compile(r'^\s*(\d+)\. (.*)$', re.MULTILINE)
+
+TRANSCRIPT = "I usually go hiking with my friends on the weekend, and sometimes we cook dinner together."
+
+# Bytes per second of generated audio: 24 kHz 16-bit mono PCM, or a 128 kbps compressed stream
+AUDIO_BYTES_PER_SECOND = {"pcm": 48000, "wav": 48000}
+DEFAULT_AUDIO_BYTES_PER_SECOND = 16000
+
+
+@dataclass
+class FakeServerConfig:
+    """
+    Timing and failure behaviour of the fake server.
+
+    Attributes:
+        latency (float): Seconds before the first byte of a chat response.
+        tokens_per_second (float): The rate at which chat tokens are streamed.
+        reply_words (int): The length of chat replies in words.
+        transcription_latency (float): Seconds to transcribe one request.
+        speech_latency (float): Seconds before the first byte of synthesized speech.
+        speech_realtime_factor (float): How many times faster than real time speech is synthesized.
+        speech_chars_per_second (float): The speaking rate used to size the synthesized audio.
+        failure_rate (float): The probability that a request fails.
+        failure_status (int): The HTTP status of injected failures (e.g. 429 or 500).
+        retry_after (float): The Retry-After header sent with injected failures, or 0 for none.
+    """
+    latency: float = 0.4
+    tokens_per_second: float = 40.0
+    reply_words: int = 45
+    transcription_latency: float = 0.6
+    speech_latency: float = 0.3
+    speech_realtime_factor: float = 4.0
+    speech_chars_per_second: float = 15.0
+    failure_rate: float = 0.0
+    failure_status: int = 429
+    retry_after: float = 0.0
+
+
+def fake_reply(words: int) -> list[str]:
+    """
+    Return a tutor-like reply of the given length, split into streamable tokens.
+    """
+    tokens = []
+    sentences = iter(REPLY_SENTENCES * (words // 5 + 1))
+    while len(tokens) < words:
+        tokens.extend(word + " " for word in next(sentences).split())
+    tokens = tokens[:words]
+    tokens[-1] = tokens[-1].rstrip(" .!?,") + "."
+    return tokens
+
+
+def fake_numbered_reply(prompt: str) -> list[str]:
+    """
+    Answer a numbered batch prompt (as sent by BatchTranslator) line for line, or return None.
+    """
+    lines = NUMBERED_LINE.findall(prompt)
+    if not lines:
+        return None
+    return [f"{number}. [translated] {text}\n" for number, text in lines]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Serves the fake endpoints. The server's config attribute holds a FakeServerConfig.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeServerConfig:
+        return self.server.config
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.config.failure_rate and random.random() < self.config.failure_rate:
+            return self.__send_failure()
+
+        if self.path.endswith("/chat/completions"):
+            self.__chat(json.loads(body))
+        elif self.path.endswith("/audio/transcriptions"):
+            self.__transcription()
+        elif self.path.endswith("/audio/speech"):
+            self.__speech(json.loads(body))
+        else:
+            self.__send_json(404, {"error": {"message": f"Unknown endpoint {self.path}", "type": "invalid_request_error", "code": None}})
+
+    def __send_json(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __send_failure(self):
+        headers = {"Retry-After": f"{self.config.retry_after:g}"} if self.config.retry_after else {}
+        error_type = "rate_limit_exceeded" if self.config.failure_status == 429 else "server_error"
+        self.__send_json(self.config.failure_status, {"error": {"message": "Injected failure", "type": error_type, "code": error_type}}, headers)
+
+    def __start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def __write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def __end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def __chat(self, request: dict):
+        messages = request.get("messages", [])
+        tokens = (messages and fake_numbered_reply(messages[-1].get("content") or "")) or fake_reply(self.config.reply_words)
+        model = request.get("model", "gpt-3.5-turbo")
+        created = int(time.time())
+        # Roughly four characters per token
+        prompt_tokens = sum(len(message.get("content") or "") for message in messages) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)}
+        time.sleep(self.config.latency)
+
+        if not request.get("stream"):
+            time.sleep(len(tokens) / self.config.tokens_per_second)
+            return self.__send_json(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens).strip()}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        def event(delta: dict = None, finish_reason=None, chunk_usage: dict = None) -> bytes:
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                     "usage": chunk_usage}
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        self.__start_chunked("text/event-stream")
+        self.__write_chunk(event({"role": "assistant", "content": ""}))
+        for token in tokens:
+            time.sleep(1 / self.config.tokens_per_second)
+            self.__write_chunk(event({"content": token}))
+        self.__write_chunk(event({}, "stop"))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self.__write_chunk(event(chunk_usage=usage))
+        self.__write_chunk(b"data: [DONE]\n\n")
+        self.__end_chunked()
+
+    def __transcription(self):
+        time.sleep(self.config.transcription_latency)
+        self.__send_json(200, {"text": TRANSCRIPT})
+
+    def __speech(self, request: dict):
+        audio_format = request.get("response_format", "mp3")
+        duration = len(request.get("input", "")) / self.config.speech_chars_per_second
+        bytes_per_second = AUDIO_BYTES_PER_SECOND.get(audio_format, DEFAULT_AUDIO_BYTES_PER_SECOND)
+        remaining = int(duration * bytes_per_second) // 2 * 2
+        chunk_size = 4096
+        chunk = bytes(chunk_size)
+        # Time to synthesize one chunk at the configured speed
+        chunk_seconds = chunk_size / bytes_per_second / self.config.speech_realtime_factor
+
+        time.sleep(self.config.speech_latency)
+        self.__start_chunked("audio/pcm" if audio_format == "pcm" else f"audio/{audio_format}")
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            time.sleep(chunk_seconds * size / chunk_size)
+            self.__write_chunk(chunk[:size])
+            remaining -= size
+        self.__end_chunked()
+
+
+def start_server(config: FakeServerConfig = None, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the fake server in a background thread.
+
+    Args:
+        config (FakeServerConfig, optional): The server behaviour. Defaults to FakeServerConfig().
+        host (str, optional): The interface to listen on. Defaults to "127.0.0.1".
+        port (int, optional): The port to listen on; 0 picks a free port. Defaults to 0.
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is http://<host>:<server.server_port>/v1.
+        Stop it with shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = config or FakeServerConfig()
+    threading.Thread(target=server.serve_forever, name="fake-openai-server", daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add a command-line option for every FakeServerConfig field."""
+    for name, default in asdict(FakeServerConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default, metavar=name.upper())
+
+
+def config_from_args(args: argparse.Namespace) -> FakeServerConfig:
+    """Build a FakeServerConfig from options added by add_config_arguments."""
+    return FakeServerConfig(**{name: getattr(args, name) for name in asdict(FakeServerConfig())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the OpenAI API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(config_from_args(args), args.host, args.port)
+    print(f"Fake OpenAI server listening on http://{args.host}:{server.server_port}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,405 @@
+import copy
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 
-def load_json(filename):
-    if os.path.exists(filename):
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+"""
+    Notes:
+    Collections in db/ are stored as a JSON snapshot plus an append-only journal
+    (<filename>.journal, one JSON entry per line). Adding a record only appends a
+    line to the journal, so its cost does not depend on how much data is already
+    stored. load_json replays the journal on top of the snapshot, and once the
+    journal grows past COMPACTION_THRESHOLD entries it is folded back into the
+    snapshot by a background thread.
+
+    Parsed documents are kept in a process-wide cache, validated against the
+    mtime and size of the snapshot and journal files. Documents returned by
+    load_json are shared with the cache and must be treated as read-only; copy
+    them before modifying. Data passed to save_json and the write functions is
+    copied into the cache, so callers may keep using it afterwards.
+
+    Every compaction starts a new journal generation. The snapshot records the
+    generation it includes (under GENERATION_KEY, hidden from callers) and every
+    journal entry records the generation it was written in, so entries that
+    are already part of the snapshot are skipped on replay. A crash between
+    writing the snapshot and removing the journal therefore cannot apply the
+    same entry twice.
+
+    Several processes may share db/. Every write happens while holding an
+    advisory lock on <filename>.lock, snapshots are written to a temporary file
+    and atomically renamed over the target, and update_record offers an
+    optimistic read-modify-write that only holds the lock to append its result.
+    Reads do not take the lock (so read-only files such as db/vocabulary.json
+    never get a .lock file): a read is retried if the snapshot or journal
+    changed while it ran, and only falls back to the lock after READ_ATTEMPTS.
+    """
+
+JOURNAL_SUFFIX = ".journal"
+COMPACTION_THRESHOLD = 200
+GENERATION_KEY = "__journal_generation__"
+READ_ATTEMPTS = 5
+
+_locks: dict = {}
+_locks_guard = threading.Lock()
+_journal_lengths: dict = {}
+_compacting: set = set()
+_cache: dict = {}
+_generations: dict = {}
+_cache_stats: dict = {"hits": 0, "misses": 0}
+_file_lock_depths: dict = {}
+
+# Read once at import: setting the process-wide umask, even briefly, races with
+# other threads creating files
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def _get_lock(filename):
+    path = os.path.abspath(filename)
+    with _locks_guard:
+        if path not in _locks:
+            _locks[path] = threading.RLock()
+        return _locks[path]
+
+
+@contextmanager
+def _locked(filename):
+    """
+    Hold the in-process lock and the inter-process file lock of a collection.
+
+    The file lock is re-entrant within a thread: nested calls reuse the lock
+    taken by the outermost call.
+    """
+    path = os.path.abspath(filename)
+    with _get_lock(filename):
+        depth = _file_lock_depths.get(path, (0, None))
+        if depth[0] == 0:
+            lock_file = open(path + ".lock", 'a+')
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            depth = (0, lock_file)
+        _file_lock_depths[path] = (depth[0] + 1, depth[1])
+        try:
+            yield
+        finally:
+            count, lock_file = _file_lock_depths[path]
+            if count == 1:
+                del _file_lock_depths[path]
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                lock_file.close()
+            else:
+                _file_lock_depths[path] = (count - 1, lock_file)
+
+
+def _journal_path(filename):
+    return filename + JOURNAL_SUFFIX
+
+
+def _file_signature(filename):
+    try:
+        stat = os.stat(filename)
+        return (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return None
+
+
+def _file_mode(filename):
+    """Return the permission bits of the file, or those a new file would get under the umask."""
+    try:
+        return os.stat(filename).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~_umask
+
+
+def _cache_signature(filename):
+    return (_file_signature(filename), _file_signature(_journal_path(filename)))
+
+
+def _read_snapshot(filename):
+    """
+    Returns:
+        tuple: The snapshot document and the journal generation it includes.
+    """
+    data = {}
+    signature = None
+    try:
         with open(filename, 'r') as file:
-            return json.load(file)
-    return {}
+            # The signature of the file actually read, even if it is replaced meanwhile
+            stat = os.fstat(file.fileno())
+            signature = (stat.st_mtime_ns, stat.st_size)
+            data = json.load(file)
+    except FileNotFoundError:
+        pass
+    generation = data.pop(GENERATION_KEY, 0) if isinstance(data, dict) else 0
+    _generations[os.path.abspath(filename)] = (signature, generation)
+    return data, generation
+
+
+def _snapshot_generation(filename):
+    """Return the journal generation included in the snapshot, re-reading it only if it changed."""
+    cached = _generations.get(os.path.abspath(filename))
+    if cached is not None and cached[0] == _file_signature(filename):
+        return cached[1]
+    return _read_snapshot(filename)[1]
+
+
+def _apply_entry(data, entry):
+    key = entry.get("key")
+    if entry.get("op") == "append":
+        data.setdefault(key, []).append(entry.get("value"))
+    elif entry.get("op") == "set":
+        data[key] = entry.get("value")
+
+
+def _replay_journal(filename, data, generation=0):
+    """
+    Apply the journal entries of the file that are newer than generation to data.
+
+    A trailing line that is not valid JSON (an interrupted append) is ignored.
+    Entries written before generations were recorded count as generation 1.
+
+    Returns:
+        int: The number of entries found in the journal.
+    """
+    journal = _journal_path(filename)
+    if not os.path.exists(journal):
+        return 0
+
+    count = 0
+    with open(journal, 'r') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("g", 1) > generation:
+                _apply_entry(data, entry)
+            count += 1
+    return count
+
+
+def _read_document(filename, signature):
+    """Read the snapshot and replay the journal (if signature says there is one)."""
+    data, generation = _read_snapshot(filename)
+    if signature[1] is not None:
+        if not isinstance(data, dict):
+            data = {}
+        _journal_lengths[filename] = _replay_journal(filename, data, generation)
+    return data
+
+
+def load_json(filename):
+    path = os.path.abspath(filename)
+    with _get_lock(filename):
+        signature = _cache_signature(filename)
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            _cache_stats["hits"] += 1
+            return cached[1]
+        _cache_stats["misses"] += 1
+        if signature == (None, None):
+            return {}
+
+        # Read without the inter-process lock: snapshots are replaced atomically, and
+        # a read is only kept if neither file changed while it ran
+        for _ in range(READ_ATTEMPTS):
+            data = _read_document(filename, signature)
+            current = _cache_signature(filename)
+            if current == signature:
+                break
+            signature = current
+        else:
+            with _locked(filename):
+                signature = _cache_signature(filename)
+                data = _read_document(filename, signature)
+
+        if signature != (None, None):
+            _cache[path] = (signature, data)
+        return data
+
 
 def save_json(filename, data):
-    with open(filename, 'w') as file:
-        json.dump(data, file, indent=4)
+    with _locked(filename):
+        journal_exists = os.path.exists(_journal_path(filename))
+        # The new snapshot supersedes every entry of the current journal generation
+        generation = _snapshot_generation(filename) + (1 if journal_exists else 0)
+        document = {GENERATION_KEY: generation, **data} if generation and isinstance(data, dict) else data
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(document, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            # mkstemp creates the file readable by its owner only; keep the permissions of the file it replaces
+            os.chmod(temp_path, _file_mode(filename))
+            os.replace(temp_path, filename)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        _generations[os.path.abspath(filename)] = (_file_signature(filename), generation)
+        if journal_exists:
+            os.remove(_journal_path(filename))
+        _journal_lengths[filename] = 0
+        # Cache a copy: the caller may keep modifying its data after saving it
+        _cache[os.path.abspath(filename)] = (_cache_signature(filename), copy.deepcopy(data))
+
+
+def cache_stats():
+    """
+    Report the effectiveness of the load_json cache.
+
+    Returns:
+        dict: The number of cache hits, misses and cached documents.
+    """
+    return {**_cache_stats, "entries": len(_cache)}
+
+
+def clear_cache():
+    """
+    Drop every cached document and reset the hit/miss counters.
+    """
+    _cache.clear()
+    _cache_stats["hits"] = 0
+    _cache_stats["misses"] = 0
+
+
+def append_record(filename, key, record):
+    """
+    Append a record to the list stored under key without rewriting the file.
+
+    Args:
+        filename (str): The collection file.
+        key (str): The top-level key (usually a user ID).
+        record: A JSON-serializable record to append.
+    """
+    _write_journal_entry(filename, {"op": "append", "key": key, "value": record})
+
+
+def set_record(filename, key, value):
+    """
+    Replace the value stored under key without rewriting the file.
+
+    Args:
+        filename (str): The collection file.
+        key (str): The top-level key (usually a user ID).
+        value: A JSON-serializable value.
+    """
+    _write_journal_entry(filename, {"op": "set", "key": key, "value": value})
+
+
+def update_record(filename, key, update, default=None, max_attempts=10):
+    """
+    Atomically replace the value stored under key with update(current value).
+
+    The update is computed without holding the file lock; the result is only
+    written if the collection has not changed in the meantime, otherwise it is
+    recomputed from the fresh value. After max_attempts conflicts the whole
+    read-modify-write runs under the lock.
+
+    Args:
+        filename (str): The collection file.
+        key (str): The top-level key (usually a user ID).
+        update (callable): Receives a copy of the current value and returns the new one.
+        default: The current value used when key is not present.
+        max_attempts (int, optional): Optimistic attempts before locking. Defaults to 10.
+
+    Returns:
+        The value that was written.
+    """
+    for _ in range(max_attempts):
+        signature = _cache_signature(filename)
+        data = load_json(filename)
+        value = update(copy.deepcopy(data.get(key, default) if isinstance(data, dict) else default))
+        with _locked(filename):
+            if _cache_signature(filename) == signature:
+                needs_compaction = _append_entry_locked(filename, {"op": "set", "key": key, "value": value})
+                break
+    else:
+        with _locked(filename):
+            data = load_json(filename)
+            value = update(copy.deepcopy(data.get(key, default) if isinstance(data, dict) else default))
+            needs_compaction = _append_entry_locked(filename, {"op": "set", "key": key, "value": value})
+
+    if needs_compaction:
+        _schedule_compaction(filename)
+    return value
+
+
+def compact_json(filename):
+    """
+    Fold the journal of a collection into its snapshot and remove the journal.
+    """
+    with _locked(filename):
+        if os.path.exists(_journal_path(filename)):
+            save_json(filename, load_json(filename))
+
+
+def _write_journal_entry(filename, entry):
+    with _locked(filename):
+        needs_compaction = _append_entry_locked(filename, entry)
+
+    if needs_compaction:
+        _schedule_compaction(filename)
+
+
+def _append_entry_locked(filename, entry):
+    """
+    Append an entry to the journal. The caller must hold _locked(filename).
+
+    Returns:
+        bool: Whether the journal has grown enough to be compacted.
+    """
+    line = json.dumps({**entry, "g": _snapshot_generation(filename) + 1}) + "\n"
+    journal = _journal_path(filename)
+    if filename not in _journal_lengths:
+        _journal_lengths[filename] = _replay_journal(filename, {})
+
+    path = os.path.abspath(filename)
+    cached = _cache.pop(path, None)
+    is_current = cached is not None and cached[0] == _cache_signature(filename)
+    with open(journal, 'a') as file:
+        file.write(line)
+    _journal_lengths[filename] += 1
+
+    # Keep the cached document in step with the journal instead of re-parsing it
+    if is_current and isinstance(cached[1], dict):
+        _apply_entry(cached[1], copy.deepcopy(entry))
+        _cache[path] = (_cache_signature(filename), cached[1])
+    return _journal_lengths[filename] >= COMPACTION_THRESHOLD
+
+
+def _schedule_compaction(filename):
+    with _locks_guard:
+        if filename in _compacting:
+            return
+        _compacting.add(filename)
+
+    def compact():
+        try:
+            compact_json(filename)
+        except Exception as e:
+            print(f"Error compacting {filename}: {e}")
+        finally:
+            with _locks_guard:
+                _compacting.discard(filename)
+
+    threading.Thread(target=compact, name=f"compact:{filename}").start()
@@ -0,0 +1,40 @@
+import argparse
+import os
+from .storage import migrate_json_to_sqlite, migrate_json_to_sharded
+
+"""
+    Migrate user data between storage backends.
+
+    Usage:
+        python -m english_practice.utils.migrate_storage sqlite --db-dir db --database db/english_practice.db
+        python -m english_practice.utils.migrate_storage sharded --db-dir db
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate English Practice Simulator data from the JSON files in db/.")
+    subparsers = parser.add_subparsers(dest="target", required=True)
+
+    sqlite_parser = subparsers.add_parser("sqlite", help="Copy the JSON collections into a SQLite database.")
+    sqlite_parser.add_argument("--db-dir", default="db", help="Directory holding the JSON collection files.")
+    sqlite_parser.add_argument("--database", default="db/english_practice.db", help="SQLite database to create or fill.")
+
+    sharded_parser = subparsers.add_parser("sharded", help="Split the JSON collections into per-user files under db/users.")
+    sharded_parser.add_argument("--db-dir", default="db", help="Directory holding the JSON collection files.")
+
+    args = parser.parse_args()
+
+    if args.target == "sqlite":
+        migrated = migrate_json_to_sqlite(args.db_dir, args.database)
+        for collection, count in migrated.items():
+            print(f"{collection}: {count} migrated")
+        print(f"Set ENGLISH_PRACTICE_STORAGE=sqlite to use {args.database}.")
+    elif args.target == "sharded":
+        migrated = migrate_json_to_sharded(args.db_dir)
+        for collection, count in migrated.items():
+            print(f"{collection}: {count} migrated")
+        print(f"Set ENGLISH_PRACTICE_STORAGE=sharded to use {os.path.join(args.db_dir, 'users')}.")
+
+
+if __name__ == "__main__":
+    main()
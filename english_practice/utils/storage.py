@@ -0,0 +1,348 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from ..config import get_setting
+from .json_utils import load_json, save_json, append_record, set_record, update_record
+
+"""
+    Notes:
+    User data is organised in collections keyed by user ID. Record collections
+    (feedback, quiz history) hold a list of records per user, value collections
+    (user stats) hold a single dictionary per user.
+    Every backend is safe to share between processes: add_record appends
+    atomically and update_value performs an atomic read-modify-write.
+    The backend is selected with the ENGLISH_PRACTICE_STORAGE setting:
+    - "json" (default): one JSON file per collection in db/ (see json_utils).
+    - "sharded": one JSON file per user and collection in db/users/<hash>/,
+      named after a SHA-256 hash of the user ID, with db/users/index.json
+      mapping the known user IDs to their directories.
+    - "sqlite": a local SQLite database (ENGLISH_PRACTICE_SQLITE_PATH) with
+      indexes on user ID and timestamp.
+    """
+
+FEEDBACK = "english_practice_feedback"
+QUIZ_HISTORY = "vocabulary_quiz_history"
+USER_STATS = "user_stats"
+
+RECORD_COLLECTIONS = (FEEDBACK, QUIZ_HISTORY)
+VALUE_COLLECTIONS = (USER_STATS,)
+
+
+class JsonStorage:
+    """
+    Storage backend keeping each collection in a JSON file in the db directory.
+    """
+
+    def __init__(self, db_dir: str = "db"):
+        self.db_dir: str = db_dir
+
+    def path(self, collection: str) -> str:
+        return os.path.join(self.db_dir, f"{collection}.json")
+
+    def get_records(self, collection: str, user_id: str) -> list:
+        data = load_json(self.path(collection))
+        return list(data.get(user_id, [])) if isinstance(data, dict) else []
+
+    def add_record(self, collection: str, user_id: str, record: dict) -> None:
+        append_record(self.path(collection), user_id, record)
+
+    def get_value(self, collection: str, user_id: str) -> dict:
+        data = load_json(self.path(collection))
+        return dict(data.get(user_id, {})) if isinstance(data, dict) else {}
+
+    def set_value(self, collection: str, user_id: str, value: dict) -> None:
+        set_record(self.path(collection), user_id, value)
+
+    def update_value(self, collection: str, user_id: str, update) -> dict:
+        return update_record(self.path(collection), user_id, update, default={})
+
+
+class ShardedJsonStorage:
+    """
+    Storage backend keeping each user's collections in their own JSON files.
+
+    Record collections are stored as {"records": [...]} and value collections as
+    {"value": {...}}, so writes only ever touch the active user's files.
+    """
+
+    def __init__(self, db_dir: str = "db"):
+        self.db_dir: str = db_dir
+        self.users_dir: str = os.path.join(db_dir, "users")
+        self.index_path: str = os.path.join(self.users_dir, "index.json")
+        self.__moved_users: set = set()
+
+    def user_dir(self, user_id: str) -> str:
+        """
+        Return the directory of a user's files.
+
+        The directory is named after a hash of the user ID, so every ID gets its
+        own directory inside users_dir whatever characters it contains.
+        """
+        directory = os.path.join(self.users_dir, hashlib.sha256(str(user_id).encode("utf-8")).hexdigest())
+        if user_id not in self.__moved_users:
+            self.__move_legacy_dir(str(user_id), directory)
+            self.__moved_users.add(user_id)
+        return directory
+
+    def __move_legacy_dir(self, user_id: str, directory: str) -> None:
+        """Move a directory named after the sanitized user ID (the former layout) to directory."""
+        entry = load_json(self.index_path).get(user_id)
+        legacy_name = entry.get("directory") if isinstance(entry, dict) else None
+        if not legacy_name or legacy_name == os.path.basename(directory) or legacy_name in (".", ".."):
+            return
+        legacy_dir = os.path.join(self.users_dir, legacy_name)
+        if os.path.isdir(legacy_dir) and not os.path.exists(directory):
+            try:
+                os.rename(legacy_dir, directory)
+            except FileNotFoundError:
+                pass  # Another process moved it first
+        if os.path.isdir(directory):
+            set_record(self.index_path, user_id, {"directory": os.path.basename(directory)})
+
+    def path(self, collection: str, user_id: str) -> str:
+        return os.path.join(self.user_dir(user_id), f"{collection}.json")
+
+    def __ensure_user_dir(self, user_id: str) -> None:
+        directory = self.user_dir(user_id)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            set_record(self.index_path, str(user_id), {"directory": os.path.basename(directory)})
+
+    def get_records(self, collection: str, user_id: str) -> list:
+        data = load_json(self.path(collection, user_id))
+        return list(data.get("records", [])) if isinstance(data, dict) else []
+
+    def add_record(self, collection: str, user_id: str, record: dict) -> None:
+        self.__ensure_user_dir(user_id)
+        append_record(self.path(collection, user_id), "records", record)
+
+    def get_value(self, collection: str, user_id: str) -> dict:
+        data = load_json(self.path(collection, user_id))
+        return dict(data.get("value", {})) if isinstance(data, dict) else {}
+
+    def set_value(self, collection: str, user_id: str, value: dict) -> None:
+        self.__ensure_user_dir(user_id)
+        set_record(self.path(collection, user_id), "value", value)
+
+    def update_value(self, collection: str, user_id: str, update) -> dict:
+        self.__ensure_user_dir(user_id)
+        return update_record(self.path(collection, user_id), "value", update, default={})
+
+    def user_ids(self) -> list:
+        return list(load_json(self.index_path).keys())
+
+    def replace_user_collection(self, collection: str, user_id: str, records: list = None, value: dict = None) -> None:
+        self.__ensure_user_dir(user_id)
+        save_json(self.path(collection, user_id), {"records": records} if records is not None else {"value": value})
+
+
+class SQLiteStorage:
+    """
+    Storage backend keeping all collections in a single SQLite database.
+
+    Each thread uses its own connection; the database runs in WAL mode so readers
+    do not block the writer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            collection TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            timestamp TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_records_user_timestamp
+            ON records (collection, user_id, timestamp);
+        CREATE TABLE IF NOT EXISTS user_values (
+            collection TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (collection, user_id)
+        );
+    """
+
+    def __init__(self, database: str = "db/english_practice.db"):
+        self.database: str = database
+        self.__local = threading.local()
+        with self.__connect() as connection:
+            connection.executescript(self.SCHEMA)
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.database, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.__local.connection = connection
+        return connection
+
+    def replace_collection(self, collection: str, records: dict = None, values: dict = None) -> None:
+        """
+        Replace every record or value of a collection in a single transaction.
+
+        Args:
+            collection (str): The collection to replace.
+            records (dict, optional): The lists of records keyed by user ID.
+            values (dict, optional): The values keyed by user ID.
+        """
+        with self.__connect() as connection:
+            connection.execute("DELETE FROM records WHERE collection = ?", (collection,))
+            connection.execute("DELETE FROM user_values WHERE collection = ?", (collection,))
+            connection.executemany(
+                "INSERT INTO records (collection, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                [(collection, user_id, record.get("timestamp"), json.dumps(record))
+                 for user_id, user_records in (records or {}).items() for record in user_records]
+            )
+            connection.executemany(
+                "INSERT INTO user_values (collection, user_id, data) VALUES (?, ?, ?)",
+                [(collection, user_id, json.dumps(value)) for user_id, value in (values or {}).items()]
+            )
+
+    def get_records(self, collection: str, user_id: str) -> list:
+        rows = self.__connect().execute(
+            "SELECT data FROM records WHERE collection = ? AND user_id = ? ORDER BY timestamp, id",
+            (collection, user_id)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def add_record(self, collection: str, user_id: str, record: dict) -> None:
+        self.add_records(collection, user_id, [record])
+
+    def add_records(self, collection: str, user_id: str, records: list) -> None:
+        with self.__connect() as connection:
+            connection.executemany(
+                "INSERT INTO records (collection, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                [(collection, user_id, record.get("timestamp"), json.dumps(record)) for record in records]
+            )
+
+    def get_value(self, collection: str, user_id: str) -> dict:
+        row = self.__connect().execute(
+            "SELECT data FROM user_values WHERE collection = ? AND user_id = ?",
+            (collection, user_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def set_value(self, collection: str, user_id: str, value: dict) -> None:
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO user_values (collection, user_id, data) VALUES (?, ?, ?)",
+                (collection, user_id, json.dumps(value))
+            )
+
+    def update_value(self, collection: str, user_id: str, update) -> dict:
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT data FROM user_values WHERE collection = ? AND user_id = ?",
+                (collection, user_id)
+            ).fetchone()
+            value = update(json.loads(row[0]) if row else {})
+            connection.execute(
+                "INSERT OR REPLACE INTO user_values (collection, user_id, data) VALUES (?, ?, ?)",
+                (collection, user_id, json.dumps(value))
+            )
+            connection.commit()
+            return value
+        except BaseException:
+            connection.rollback()
+            raise
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    Return the process-wide storage backend selected by configuration.
+
+    Returns:
+        JsonStorage | ShardedJsonStorage | SQLiteStorage: The configured storage backend.
+
+    Raises:
+        ValueError: If ENGLISH_PRACTICE_STORAGE names an unknown backend.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            backend = get_setting("ENGLISH_PRACTICE_STORAGE", "json").lower()
+            db_dir = get_setting("ENGLISH_PRACTICE_DB_DIR", "db")
+            if backend == "json":
+                _storage = JsonStorage(db_dir)
+            elif backend == "sharded":
+                _storage = ShardedJsonStorage(db_dir)
+            elif backend == "sqlite":
+                _storage = SQLiteStorage(get_setting("ENGLISH_PRACTICE_SQLITE_PATH", os.path.join(db_dir, "english_practice.db")))
+            else:
+                raise ValueError(f"Unknown storage backend: {backend}")
+        return _storage
+
+
+def migrate_json_to_sqlite(db_dir: str = "db", database: str = "db/english_practice.db") -> dict:
+    """
+    Copy the JSON collections in db_dir into a SQLite database.
+
+    Collections already present in the database are replaced, so the migration
+    can be run again safely.
+
+    Args:
+        db_dir (str): Directory holding the JSON collection files.
+        database (str): Path of the SQLite database to fill.
+
+    Returns:
+        dict: The number of migrated records or values per collection.
+    """
+    source = JsonStorage(db_dir)
+    target = SQLiteStorage(database)
+    migrated = {}
+
+    # Each collection is cleared and refilled in one transaction, so an interrupted
+    # migration leaves it either untouched or complete
+    for collection in RECORD_COLLECTIONS:
+        data = load_json(source.path(collection))
+        records = data if isinstance(data, dict) else {}
+        target.replace_collection(collection, records=records)
+        migrated[collection] = sum(len(user_records) for user_records in records.values())
+
+    for collection in VALUE_COLLECTIONS:
+        data = load_json(source.path(collection))
+        values = data if isinstance(data, dict) else {}
+        target.replace_collection(collection, values=values)
+        migrated[collection] = len(values)
+
+    return migrated
+
+
+def migrate_json_to_sharded(db_dir: str = "db") -> dict:
+    """
+    Split the combined JSON collections in db_dir into per-user files under db_dir/users.
+
+    Each user's collection file is overwritten with the data from the combined
+    file, so the migration can be run again safely.
+
+    Args:
+        db_dir (str): Directory holding the JSON collection files.
+
+    Returns:
+        dict: The number of migrated records or values per collection.
+    """
+    source = JsonStorage(db_dir)
+    target = ShardedJsonStorage(db_dir)
+    migrated = {}
+
+    for collection in RECORD_COLLECTIONS + VALUE_COLLECTIONS:
+        data = load_json(source.path(collection))
+        migrated[collection] = 0
+        for user_id, content in (data.items() if isinstance(data, dict) else []):
+            if collection in RECORD_COLLECTIONS:
+                target.replace_user_collection(collection, user_id, records=content)
+                migrated[collection] += len(content)
+            else:
+                target.replace_user_collection(collection, user_id, value=content)
+                migrated[collection] += 1
+
+    return migrated
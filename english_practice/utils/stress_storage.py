@@ -0,0 +1,97 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from .json_utils import JOURNAL_SUFFIX, append_record, compact_json, clear_cache, load_json, update_record
+
+"""
+    Check that the journaled JSON storage loses no writes when several processes share it.
+
+    Every worker process increments a shared counter with update_record and appends one record
+    per iteration with append_record, so the journals are compacted several times while other
+    processes are writing. At the end the counter and the number of records must match the
+    number of writes exactly.
+
+    Usage:
+        python -m english_practice.utils.stress_storage --processes 8 --iterations 300
+    """
+
+
+def _worker(filename: str, worker_id: int, iterations: int) -> None:
+    for i in range(iterations):
+        update_record(filename, "counter", lambda value: value + 1, default=0)
+        append_record(filename, "records", {"worker": worker_id, "iteration": i})
+
+
+def run_stress_test(filename: str, processes: int, iterations: int) -> dict:
+    """
+    Run the workers against filename and check the result.
+
+    Args:
+        filename (str): The collection file to write to; it should not exist yet.
+        processes (int): The number of worker processes.
+        iterations (int): The number of increments and appends each worker makes.
+
+    Returns:
+        dict: The expected and actual counter and record count, and the elapsed time.
+
+    Raises:
+        AssertionError: If a write was lost or applied twice.
+    """
+    start = time.perf_counter()
+    workers = [multiprocessing.Process(target=_worker, args=(filename, worker_id, iterations)) for worker_id in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    if any(worker.exitcode != 0 for worker in workers):
+        raise AssertionError("A worker process failed")
+
+    expected = processes * iterations
+    clear_cache()
+    data = load_json(filename)
+    result = {"expected": expected, "counter": data.get("counter"), "records": len(data.get("records", [])), "seconds": elapsed}
+    assert result["counter"] == expected, f"Counter is {result['counter']}, expected {expected}"
+    assert result["records"] == expected, f"Found {result['records']} records, expected {expected}"
+
+    # Folding the journal into the snapshot must not change the data either
+    compact_json(filename)
+    clear_cache()
+    data = load_json(filename)
+    assert data.get("counter") == expected and len(data.get("records", [])) == expected, "Compaction changed the data"
+    pairs = {(record["worker"], record["iteration"]) for record in data["records"]}
+    assert len(pairs) == expected, "Some records were duplicated"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the journaled JSON storage with several concurrent processes.")
+    parser.add_argument("--processes", type=int, default=8, help="Number of worker processes.")
+    parser.add_argument("--iterations", type=int, default=300, help="Increments and appends per process.")
+    parser.add_argument("--db-dir", help="Directory to write to (defaults to a temporary directory).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # A fresh file on every run, so runs in the same --db-dir do not see each other's data
+        filename = os.path.join(args.db_dir or temp_dir, f"stress-{uuid.uuid4().hex}.json")
+        try:
+            result = run_stress_test(filename, args.processes, args.iterations)
+        except AssertionError as e:
+            print(f"FAILED: {e}")
+            sys.exit(1)
+        finally:
+            for path in (filename, filename + JOURNAL_SUFFIX, filename + ".lock"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    print(f"OK: counter={result['counter']} records={result['records']} "
+          f"({result['expected']} writes each, {result['seconds']:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
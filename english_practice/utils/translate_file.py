@@ -0,0 +1,42 @@
+import argparse
+import os
+from ..config import get_setting
+from ..openai_client import OpenAIClient
+from ..async_openai_client import AsyncOpenAIClient
+from ..batch_translator import BatchTranslator
+
+"""
+    Translate a text or CSV file line by line between English and Arabic.
+
+    Usage:
+        python -m english_practice.utils.translate_file words.txt
+        python -m english_practice.utils.translate_file lesson.csv --column word --output lesson.translated.csv
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate a text or CSV file line by line between English and Arabic.")
+    parser.add_argument("input_file", help="The .txt or .csv file to translate.")
+    parser.add_argument("--output", help="The file to write. Defaults to <input>.translated<extension>.")
+    parser.add_argument("--column", help="For CSV files, the name or number of the column to translate. Defaults to the first column.")
+    parser.add_argument("--max-lines", type=int, default=40, help="The maximum number of lines per request.")
+    parser.add_argument("--max-chars", type=int, default=2000, help="The maximum number of characters per request.")
+    parser.add_argument("--parallel", type=int, default=get_setting("ENGLISH_PRACTICE_MAX_CONCURRENT_REQUESTS", 4, int),
+                        help="The maximum number of requests in flight.")
+    args = parser.parse_args()
+
+    name, extension = os.path.splitext(args.input_file)
+    output_file = args.output or f"{name}.translated{extension}"
+
+    translator = BatchTranslator(AsyncOpenAIClient(args.parallel), OpenAIClient().translation_cache, args.max_lines, args.max_chars)
+    stats = translator.translate_file(
+        args.input_file, output_file, args.column,
+        lambda written: print(f"\rTranslated {written} lines...", end="", flush=True)
+    )
+    print()
+    print(f"Translation written to {output_file}: {stats['translated']} translated, "
+          f"{stats['cached']} from cache, {stats['empty']} empty, {stats['failed']} failed.")
+
+
+if __name__ == "__main__":
+    main()
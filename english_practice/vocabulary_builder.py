@@ -1,11 +1,11 @@
 import random
-import json
 from datetime import datetime
 from colorama import Fore, Style
 from simple_term_menu import TerminalMenu
 from .achievements import Achievements
 from .authentication import GoogleAuthenticator
 from .utils.json_utils import load_json
+from .utils.storage import get_storage, QUIZ_HISTORY
 
 class VocabularyBuilder:
     """
@@ -17,6 +17,7 @@ class VocabularyBuilder:
         """
         try:
             self.user_id = GoogleAuthenticator().get_stored_user_id()
+            self.storage = get_storage()
             self.vocabulary_quiz = self.__load_vocabulary()
             self.vocabulary_quiz_reversed = {definition: word for word, definition in self.vocabulary_quiz.items()}
             self.correct_answers = 0
@@ -34,14 +35,8 @@ class VocabularyBuilder:
             return {}
     
     def __load_vocabulary_quiz_history(self):
-        filename = 'db/vocabulary_quiz_history.json'
         try:
-            with open(filename, 'r') as file:
-                history = json.load(file)
-                return history.get(self.user_id, []) if isinstance(history, dict) else []
-        except FileNotFoundError:
-            print(f"{Fore.YELLOW}Vocabulary quiz history file not found. Creating a new one.{Style.RESET_ALL}")
-            return []
+            return self.storage.get_records(QUIZ_HISTORY, self.user_id)
         except Exception as e:
             print(f"{Fore.RED}Error loading vocabulary quiz history: {str(e)}{Style.RESET_ALL}")
             return []
@@ -50,29 +45,13 @@ class VocabularyBuilder:
     def __save_vocabulary_quiz(self):
         if not self.vocabulary_quiz:
             return
-        filename = 'db/vocabulary_quiz_history.json'
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         new_result = {
             "timestamp": current_time,
             "result": f"{self.correct_answers} out of 5"
         }
         try:
-            with open(filename, 'r') as file:
-                history = json.load(file)
-        except FileNotFoundError:
-            history = {}
-        except Exception as e:
-            print(f"{Fore.RED}Error reading vocabulary quiz history: {str(e)}{Style.RESET_ALL}")
-            history = {}
-        
-        if self.user_id not in history:
-            history[self.user_id] = []
-        
-        history[self.user_id].append(new_result)
-        
-        try:
-            with open(filename, 'w') as file:
-                json.dump(history, file, indent=4)
+            self.storage.add_record(QUIZ_HISTORY, self.user_id, new_result)
         except Exception as e:
             print(f"{Fore.RED}Error saving vocabulary quiz history: {str(e)}{Style.RESET_ALL}")
 
@@ -131,7 +110,6 @@ class VocabularyBuilder:
             current_streak=self.counters["current_streak"],
             max_streak=self.counters["max_streak"]
         )
-        self.achievements.update_achievements()
     
     # Results display
     def display_vocabulary_quiz_results(self, is_for_report: bool = False):
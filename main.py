@@ -1,19 +1,53 @@
-from english_practice.simulator import EnglishPracticeSimulator
-from english_practice.authentication import GoogleAuthenticator
-from colorama import Fore, Style
+import argparse
 import os
-import google.auth.exceptions
+from english_practice.profiling import StartupProfiler, profile_section
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="English Practice Simulator")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Measure import, authentication and component start-up times, print them and exit.")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="With --profile-startup, also write the breakdown to FILE as JSON.")
+    return parser.parse_args()
+
+
+def report_startup_profile(profiler, output_file=None):
+    profiler.stop()
+    profiler.print_report()
+    if output_file:
+        profiler.save_json(output_file)
+        print(f"Startup profile written to {output_file}")
 
 
 def main():
+    args = parse_args()
+    profiler = None
+    if args.profile_startup:
+        profiler = StartupProfiler()
+        profiler.start()
+
+    with profile_section("imports"):
+        from english_practice.simulator import EnglishPracticeSimulator
+        from english_practice.authentication import GoogleAuthenticator
+        from colorama import Fore, Style
+        import google.auth.exceptions
+
     authenticator = GoogleAuthenticator()
-    
-    if not os.path.exists("token.json"):    
+
+    # Waiting for Enter would be counted as start-up time, so profiling runs do not ask
+    if not os.path.exists("token.json") and not profiler:
         input(f"{Fore.BLUE}Welcome to English Practice Simulator. First, you need to authenticate. Press Enter to continue.{Style.RESET_ALL}")
 
     try:
-        if authenticator.authenticate():
-            simulator = EnglishPracticeSimulator()
+        with profile_section("authentication", kind="network"):
+            authenticated = authenticator.authenticate()
+        if authenticated:
+            with profile_section("EnglishPracticeSimulator()", kind="component"):
+                simulator = EnglishPracticeSimulator()
+            if profiler:
+                simulator.initialize_components()
+                return
             simulator.run()
         else:
             print("Authentication failed. Please try again.")
@@ -23,6 +57,9 @@ def main():
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         print("Please try again or contact support if the issue persists.")
+    finally:
+        if profiler:
+            report_startup_profile(profiler, args.profile_output)
 
 if __name__ == "__main__":
     main()